@@ -1,6 +1,5 @@
 from datetime import datetime
 
-from django.db.models import Q
 from django.http import HttpResponse
 from rest_framework import status
 from rest_framework.decorators import action
@@ -22,18 +21,20 @@ from abdm.api.v3.serializers.health_id import (
     AbhaLoginVerifyOtpSerializer,
     LinkAbhaNumberAndPatientSerializer,
 )
-from abdm.models import AbhaNumber, Transaction, TransactionType
+from abdm.models import AbhaNumber, TransactionType
+from abdm.service import abha_resolver
 from abdm.service.helper import (
     generate_care_contexts_for_existing_data,
     validate_and_format_date,
 )
+from abdm.service.transaction_log import TransactionLogMixin, transaction_log
 from abdm.service.v3.gateway import GatewayService
 from abdm.service.v3.health_id import HealthIdService
 from abdm.settings import plugin_settings as settings
 from care.utils.queryset.patient import get_patient_queryset
 
 
-class HealthIdViewSet(GenericViewSet):
+class HealthIdViewSet(TransactionLogMixin, GenericViewSet):
     permission_classes = (IsAuthenticated,)
 
     serializer_action_classes = {
@@ -182,7 +183,7 @@ class HealthIdViewSet(GenericViewSet):
             },
         )
 
-        Transaction.objects.create(
+        transaction_log.log(
             reference_id=str(validated_data.get("transaction_id")),
             type=TransactionType.CREATE_OR_LINK_ABHA_NUMBER,
             meta_data={
@@ -275,7 +276,7 @@ class HealthIdViewSet(GenericViewSet):
             },
         )
 
-        Transaction.objects.create(
+        transaction_log.log(
             reference_id=str(validated_data.get("transaction_id")),
             type=TransactionType.CREATE_OR_LINK_ABHA_NUMBER,
             meta_data={
@@ -407,7 +408,7 @@ class HealthIdViewSet(GenericViewSet):
             },
         )
 
-        Transaction.objects.create(
+        transaction_log.log(
             reference_id=str(validated_data.get("transaction_id")),
             type=TransactionType.CREATE_ABHA_ADDRESS,
             meta_data={
@@ -579,7 +580,7 @@ class HealthIdViewSet(GenericViewSet):
             },
         )
 
-        Transaction.objects.create(
+        transaction_log.log(
             reference_id=token.get("txn_id"),
             type=TransactionType.CREATE_OR_LINK_ABHA_NUMBER,
             meta_data={
@@ -631,9 +632,7 @@ class HealthIdViewSet(GenericViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        abha_number = AbhaNumber.objects.filter(
-            Q(abha_number=abha_id) | Q(health_id=abha_id)
-        ).first()
+        abha_number = abha_resolver.resolve_abha_number(abha_id)
 
         if not abha_number:
             return Response(
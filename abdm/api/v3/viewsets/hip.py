@@ -2,9 +2,7 @@ import logging
 from datetime import datetime
 from functools import reduce
 
-from django.contrib.postgres.search import TrigramSimilarity
 from django.core.cache import cache
-from django.db.models import Q
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -26,13 +24,17 @@ from abdm.models import (
     AbhaNumber,
     ConsentArtefact,
     HealthFacility,
-    Transaction,
+    PatientDiscoveryIndex,
+    TransactionStatus,
     TransactionType,
 )
+from abdm.service import abha_resolver, data_flow_trace, link_token
 from abdm.service.helper import (
+    patient_gender,
     uuid,
     validate_and_format_date,
 )
+from abdm.service.transaction_log import TransactionLogMixin, transaction_log
 from abdm.service.v3.gateway import GatewayService
 from care.facility.api.serializers.patient import PatientTransferSerializer
 from care.facility.models import District, PatientRegistration, State
@@ -53,7 +55,7 @@ class HIPViewSet(GenericViewSet):
         )
 
 
-class HIPCallbackViewSet(GenericViewSet):
+class HIPCallbackViewSet(TransactionLogMixin, GenericViewSet):
     permission_classes = (IsAuthenticated,)
     authentication_classes = [ABDMAuthentication]
 
@@ -69,9 +71,8 @@ class HIPCallbackViewSet(GenericViewSet):
     }
 
     def get_patient_by_abha_id(self, abha_id: str):
-        patient = PatientRegistration.objects.filter(
-            Q(abha_number__abha_number=abha_id) | Q(abha_number__health_id=abha_id)
-        ).first()
+        abha_number = abha_resolver.resolve_abha_number(abha_id)
+        patient = abha_number.patient if abha_number else None
 
         if not patient and "@" in abha_id:
             # TODO: get abha number using gateway api and search patient
@@ -128,18 +129,16 @@ class HIPCallbackViewSet(GenericViewSet):
 
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        cache.set(
-            f"abdm_link_token__{cached_data.get("hf_id")}__{abha_number.health_id}",
+        link_token.store(
+            cached_data.get("hf_id"),
+            abha_number.health_id,
             validated_data.get("linkToken"),
-            timeout=60 * 30,
         )
 
         if cached_data.get("purpose") == "LINK_CARECONTEXT":
-            GatewayService.link__carecontext(
+            GatewayService.link__carecontext__flush(
                 {
-                    "reference_id": cached_data.get("reference_id"),
                     "patient": abha_number.patient,
-                    "care_contexts": cached_data.get("care_contexts", []),
                     "user": request.user,
                     "hf_id": cached_data.get("hf_id"),
                 }
@@ -172,33 +171,22 @@ class HIPCallbackViewSet(GenericViewSet):
         health_id_number = next(
             filter(lambda x: x.get("type") == "ABHA_NUMBER", identifiers), {}
         ).get("value")
-        patient = PatientRegistration.objects.filter(
-            Q(abha_number__abha_number=health_id_number)
-            | Q(abha_number__health_id=patient_data.get("id"))
-        ).first()
+        abha_number = abha_resolver.resolve_abha_number(
+            health_id_number
+        ) or abha_resolver.resolve_abha_number(patient_data.get("id"))
+        patient = abha_number.patient if abha_number else None
         matched_by = "ABHA_NUMBER"
 
         if not patient:
             mobile = next(
                 filter(lambda x: x.get("type") == "MOBILE", identifiers), {}
             ).get("value")
-            patient = (
-                PatientRegistration.objects.annotate(
-                    similarity=TrigramSimilarity("name", patient_data.get("name"))
-                )
-                .filter(
-                    Q(phone_number=mobile) | Q(phone_number="+91" + mobile),
-                    Q(
-                        date_of_birth__year__gte=patient_data.get("yearOfBirth") - 5,
-                        date_of_birth__year__lte=patient_data.get("yearOfBirth") + 5,
-                    )
-                    | Q(year_of_birth__gte=patient_data.get("yearOfBirth")) - 5,
-                    year_of_birth__lte=patient_data.get("yearOfBirth") + 5,
-                    gender={"M": 1, "F": 2, "O": 3}.get(patient_data.get("gender"), 3),
-                    similarity__gt=0.3,
-                )
-                .order_by("-similarity")
-                .first()
+            patient = PatientDiscoveryIndex.find_patient(
+                name=patient_data.get("name"),
+                gender=patient_gender(patient_data.get("gender")),
+                year_of_birth=patient_data.get("yearOfBirth"),
+                mobile=mobile,
+                hf_id=request.headers.get("x-hip-id"),
             )
             matched_by = "MOBILE"
 
@@ -349,73 +337,100 @@ class HIPCallbackViewSet(GenericViewSet):
 
     @action(detail=False, methods=["POST"], url_path="hip/health-information/request")
     def hip__health_information__request(self, request):
-        validated_data = self.validate_request(request)
-
-        hi_request = validated_data.get("hiRequest")
-        key_material = hi_request.get("keyMaterial")
+        with data_flow_trace.trace() as trace:
+            with trace.stage("validate"):
+                validated_data = self.validate_request(request)
+
+            trace.transaction_id = str(validated_data.get("transactionId"))
+            hi_request = validated_data.get("hiRequest")
+            key_material = hi_request.get("keyMaterial")
+
+            with trace.stage("consent_lookup"):
+                consent = ConsentArtefact.objects.filter(
+                    consent_id=hi_request.get("consent").get("id")
+                ).first()
+
+            if not consent:
+                logger.warning(
+                    f"Consent with ID: {hi_request.get('consent').get('id')} not found in the database"
+                )
 
-        consent = ConsentArtefact.objects.filter(
-            consent_id=hi_request.get("consent").get("id")
-        ).first()
+                return Response(status=status.HTTP_404_NOT_FOUND)
 
-        if not consent:
-            logger.warning(
-                f"Consent with ID: {hi_request.get('consent').get('id')} not found in the database"
-            )
-
-            return Response(status=status.HTTP_404_NOT_FOUND)
+            with trace.stage("on_request"):
+                GatewayService.data_flow__health_information__hip__on_request(
+                    {
+                        "request_id": request.headers.get("REQUEST-ID"),
+                        "transaction_id": str(validated_data.get("transactionId")),
+                    }
+                )
 
-        GatewayService.data_flow__health_information__hip__on_request(
-            {
-                "request_id": request.headers.get("REQUEST-ID"),
-                "transaction_id": str(validated_data.get("transactionId")),
-            }
-        )
+            transferred = False
+            try:
+                try:
+                    GatewayService.data_flow__health_information__transfer(
+                        {
+                            "transaction_id": str(validated_data.get("transactionId")),
+                            "consent": consent,
+                            "url": hi_request.get("dataPushUrl"),
+                            "key_material__crypto_algorithm": key_material.get("cryptoAlg"),
+                            "key_material__curve": key_material.get("curve"),
+                            "key_material__public_key": key_material.get("dhPublicKey").get(
+                                "keyValue"
+                            ),
+                            "key_material__nonce": key_material.get("nonce"),
+                        }
+                    )
+                    transferred = True
+
+                    with trace.stage("notify"):
+                        GatewayService.data_flow__health_information__notify(
+                            {
+                                "consent": consent,
+                                "consent_id": str(consent.consent_id),
+                                "transaction_id": str(validated_data.get("transactionId")),
+                                "notifier__type": "HIP",
+                                "notifier__id": request.headers.get("X-HIP-ID"),
+                                "status": "TRANSFERRED",
+                                "hip_id": request.headers.get("X-HIP-ID"),
+                            }
+                        )
+                except Exception as exception:
+                    logger.error(
+                        f"Error occurred while transferring health information: {exception!s}"
+                    )
 
-        try:
-            GatewayService.data_flow__health_information__transfer(
-                {
-                    "transaction_id": str(validated_data.get("transactionId")),
-                    "consent": consent,
-                    "url": hi_request.get("dataPushUrl"),
-                    "key_material__crypto_algorithm": key_material.get("cryptoAlg"),
-                    "key_material__curve": key_material.get("curve"),
-                    "key_material__public_key": key_material.get("dhPublicKey").get(
-                        "keyValue"
+                    with trace.stage("notify"):
+                        GatewayService.data_flow__health_information__notify(
+                            {
+                                "consent": consent,
+                                "consent_id": str(consent.consent_id),
+                                "transaction_id": str(validated_data.get("transactionId")),
+                                "notifier__type": "HIP",
+                                "notifier__id": request.headers.get("X-HIP-ID"),
+                                "status": "FAILED",
+                                "hip_id": request.headers.get("X-HIP-ID"),
+                            }
+                        )
+            finally:
+                # logged once notified, failed or not, so that the timings
+                # cover the whole transfer
+                transaction_log.log(
+                    reference_id=str(validated_data.get("transactionId")),
+                    type=TransactionType.EXCHANGE_DATA,
+                    status=(
+                        TransactionStatus.COMPLETED
+                        if transferred
+                        else TransactionStatus.FAILED
                     ),
-                    "key_material__nonce": key_material.get("nonce"),
-                }
-            )
-
-            GatewayService.data_flow__health_information__notify(
-                {
-                    "consent": consent,
-                    "consent_id": str(consent.consent_id),
-                    "transaction_id": str(validated_data.get("transactionId")),
-                    "notifier__type": "HIP",
-                    "notifier__id": request.headers.get("X-HIP-ID"),
-                    "status": "TRANSFERRED",
-                    "hip_id": request.headers.get("X-HIP-ID"),
-                }
-            )
-        except Exception as exception:
-            logger.error(
-                f"Error occurred while transferring health information: {exception!s}"
-            )
-
-            GatewayService.data_flow__health_information__notify(
-                {
-                    "consent": consent,
-                    "consent_id": str(consent.consent_id),
-                    "transaction_id": str(validated_data.get("transactionId")),
-                    "notifier__type": "HIP",
-                    "notifier__id": request.headers.get("X-HIP-ID"),
-                    "status": "FAILED",
-                    "hip_id": request.headers.get("X-HIP-ID"),
-                }
-            )
+                    meta_data={
+                        "consent_artefact": str(consent.external_id),
+                        "is_incoming": False,
+                        **trace.as_meta_data(),
+                    },
+                )
 
-        return Response(status=status.HTTP_202_ACCEPTED)
+            return Response(status=status.HTTP_202_ACCEPTED)
 
     @action(detail=False, methods=["POST"], url_path="hip/patient/share")
     def hip__patient__share(self, request):
@@ -443,21 +458,29 @@ class HIPCallbackViewSet(GenericViewSet):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
         patient_data = validated_data.get("profile").get("patient")
-        abha_number = AbhaNumber.objects.filter(
-            Q(abha_number=patient_data.get("abhaNumber"))
-            | Q(health_id=patient_data.get("abhaAddress"))
-        ).first()
-        # TODO: consider the case of existing patient without abha number
+        abha_number = abha_resolver.resolve_abha_number(
+            patient_data.get("abhaNumber")
+        ) or abha_resolver.resolve_abha_number(patient_data.get("abhaAddress"))
 
         is_existing_patient = True
+        matched_by = "ABHA"
+        patient = None
         if not abha_number:
+            matched_by = "DEMOGRAPHICS"
+            patient = PatientDiscoveryIndex.find_patient_without_abha_number(
+                name=patient_data.get("name"),
+                gender=patient_gender(patient_data.get("gender")),
+                year_of_birth=patient_data.get("yearOfBirth"),
+                mobile=patient_data.get("phoneNumber"),
+                facility=health_facility.facility,
+            )
+
+        if not abha_number and not patient:
             is_existing_patient = False
             patient = PatientRegistration.objects.create(
                 facility=health_facility.facility,
                 name=patient_data.get("name"),
-                gender={"M": 1, "F": 2, "O": 3, None: None}.get(
-                    patient_data.get("gender"), None
-                ),
+                gender=patient_gender(patient_data.get("gender")),
                 date_of_birth=datetime.strptime(
                     f"{patient_data.get('yearOfBirth')}-{patient_data.get('monthOfBirth', 1):02d}-{patient_data.get('dayOfBirth', 1):02d}",
                     "%Y-%m-%d",
@@ -475,6 +498,7 @@ class HIPCallbackViewSet(GenericViewSet):
                 is_antenatal=False,
             )
 
+        if not abha_number:
             abha_number = AbhaNumber.objects.create(
                 patient=patient,
                 abha_number=patient_data.get("abhaNumber"),
@@ -493,7 +517,7 @@ class HIPCallbackViewSet(GenericViewSet):
                 mobile=patient_data.get("phoneNumber"),
             )
 
-        else:
+        if is_existing_patient:
             serializer = PatientTransferSerializer(
                 abha_number.patient,
                 data={
@@ -537,12 +561,13 @@ class HIPCallbackViewSet(GenericViewSet):
             }
         )
 
-        Transaction.objects.create(
+        transaction_log.log(
             reference_id=uuid(),
             type=TransactionType.SCAN_AND_SHARE,
             meta_data={
                 "abha_number": str(abha_number.external_id),
                 "is_existing_patient": is_existing_patient,
+                **({"matched_by": matched_by} if is_existing_patient else {}),
                 "token": str(token_number),
             },
         )
@@ -1,4 +1,3 @@
-import json
 import logging
 
 from abdm.api.serializers.consent import ConsentRequestSerializer
@@ -20,12 +19,16 @@ from abdm.models import (
     AbhaNumber,
     ConsentArtefact,
     ConsentRequest,
-    Transaction,
+    HealthInformationPage,
     TransactionType,
 )
 from abdm.models.base import Status
+from abdm.service.transaction_log import TransactionLogMixin, transaction_log
 from abdm.service.v3.gateway import GatewayService
+from abdm.tasks.consent_fetch import fetch_consent_artefact
 from abdm.utils.cipher import Cipher
+from abdm.utils.json_codec import dumpb
+from django.db import transaction
 from django.db.models import Q
 from rest_framework import status
 from rest_framework.decorators import action
@@ -170,7 +173,7 @@ class HIUViewSet(GenericViewSet):
         )
 
 
-class HIUCallbackViewSet(GenericViewSet):
+class HIUCallbackViewSet(TransactionLogMixin, GenericViewSet):
     permission_classes = (IsAuthenticated,)
     authentication_classes = [ABDMAuthentication]
 
@@ -252,20 +255,11 @@ class HIUCallbackViewSet(GenericViewSet):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
         if consent_status != Status.DENIED:
-            for artefact in consent_artefacts:
-                consent_artefact = ConsentArtefact.objects.filter(
-                    external_id=artefact.get("id")
-                ).first()
-
-                if not consent_artefact:
-                    consent_artefact = ConsentArtefact.objects.create(
-                        external_id=artefact.get("id"),
-                        consent_request=consent,
-                        **consent.consent_details_dict(),
-                    )
-
-                consent_artefact.status = consent_status
-                consent_artefact.save()
+            ConsentArtefact.bulk_upsert(
+                consent,
+                [artefact.get("id") for artefact in consent_artefacts],
+                consent_status,
+            )
 
         consent.status = consent_status
         consent.save()
@@ -292,20 +286,11 @@ class HIUCallbackViewSet(GenericViewSet):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
         if consent_status != Status.DENIED:
-            for artefact in consent_artefacts:
-                consent_artefact = ConsentArtefact.objects.filter(
-                    external_id=artefact.get("id")
-                ).first()
-
-                if not consent_artefact:
-                    consent_artefact = ConsentArtefact.objects.create(
-                        external_id=artefact.get("id"),
-                        consent_request=consent,
-                        **consent.consent_details_dict(),
-                    )
-
-                consent_artefact.status = consent_status
-                consent_artefact.save()
+            ConsentArtefact.bulk_upsert(
+                consent,
+                [artefact.get("id") for artefact in consent_artefacts],
+                consent_status,
+            )
 
         consent.status = consent_status
         consent.save()
@@ -318,12 +303,18 @@ class HIUCallbackViewSet(GenericViewSet):
                 }
             )
 
-            for artefact in consent.consent_artefacts.all():
-                GatewayService.consent__fetch(
-                    {
-                        "artefact": artefact,
-                    }
+            artefact_ids = [
+                str(artefact_id)
+                for artefact_id in consent.consent_artefacts.values_list(
+                    "external_id", flat=True
                 )
+            ]
+            transaction.on_commit(
+                lambda: [
+                    fetch_consent_artefact.delay(artefact_id)
+                    for artefact_id in artefact_ids
+                ]
+            )
 
         return Response(status=status.HTTP_200_OK)
 
@@ -447,11 +438,21 @@ class HIUCallbackViewSet(GenericViewSet):
             file_type=FileUpload.FileType.ABDM_HEALTH_INFORMATION.value,
             associating_id=artefact.consent_request.external_id,
         )
-        file.put_object(json.dumps(entries), ContentType="application/json")
+        file.put_object(dumpb(entries), ContentType="application/json")
         file.upload_completed = True
         file.save()
 
-        Transaction.objects.create(
+        HealthInformationPage.objects.create(
+            consent_artefact=artefact,
+            file=file,
+            page_number=validated_data.get("pageNumber"),
+            page_count=validated_data.get("pageCount"),
+        )
+
+        # entries cached for the previous set of pages are unreachable now
+        artefact.invalidate_health_information_cache()
+
+        transaction_log.log(
             reference_id=validated_data.get("transactionId"),
             type=TransactionType.EXCHANGE_DATA,
             meta_data={
@@ -1,7 +1,8 @@
 from abdm.api.serializers.abha_number import AbhaNumberSerializer
-from abdm.models import AbhaNumber, Transaction, TransactionType
+from abdm.models import AbhaNumber, TransactionType
+from abdm.service import abha_resolver
 from abdm.service.helper import uuid
-from django.db.models import Q
+from abdm.service.transaction_log import TransactionLogMixin, transaction_log
 from django.http import Http404
 from rest_framework.mixins import CreateModelMixin, RetrieveModelMixin
 from rest_framework.permissions import IsAuthenticated
@@ -11,6 +12,7 @@ from care.utils.queryset.patient import get_patient_queryset
 
 
 class AbhaNumberViewSet(
+    TransactionLogMixin,
     GenericViewSet,
     CreateModelMixin,
     RetrieveModelMixin,
@@ -23,9 +25,7 @@ class AbhaNumberViewSet(
     def get_object(self):
         id = self.kwargs.get("pk")
 
-        instance = self.queryset.filter(
-            Q(abha_number=id) | Q(health_id=id) | Q(patient__external_id=id)
-        ).first()
+        instance = abha_resolver.resolve_abha_number(id)
 
         if not instance or not get_patient_queryset(self.request.user).contains(
             instance.patient
@@ -39,7 +39,7 @@ class AbhaNumberViewSet(
     def perform_create(self, serializer):
         instance = serializer.save()
 
-        Transaction.objects.create(
+        transaction_log.log(
             reference_id=uuid(),  # using random uuid as there is no transaction id for scan_and_pull
             type=TransactionType.CREATE_OR_LINK_ABHA_NUMBER,
             meta_data={
@@ -1,8 +1,14 @@
-import json
 import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from uuid import UUID
 
-from abdm.models import Transaction, TransactionType
+from abdm.models import HealthInformationPage, TransactionType
+from abdm.service.transaction_log import TransactionLogMixin, transaction_log
+from abdm.utils.health_information_cache import health_information_cache
 from django.db.models import Q
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -12,46 +18,150 @@ from care.facility.models.file_upload import FileUpload
 
 logger = logging.getLogger(__name__)
 
+# number of pages fetched from storage ahead of the one being streamed
+PAGE_PREFETCH_COUNT = 4
 
-class HealthInformationViewSet(GenericViewSet):
+
+def page_entries(file: FileUpload) -> bytes:
+    """
+    Returns the entries of a page without the surrounding brackets, so pages
+    can be concatenated into a single array without being parsed.
+    """
+    _, content = file.file_contents()
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    return content.strip()[1:-1].strip()
+
+
+def stream_health_information(files: list[FileUpload]):
+    """
+    Returns an iterator over the pages merged into a single document. The
+    first pages are fetched before returning, so that a storage error on them
+    raises here rather than after the response has started.
+    """
+    executor = ThreadPoolExecutor(max_workers=PAGE_PREFETCH_COUNT)
+    remaining = iter(files)
+    pending = deque(
+        executor.submit(page_entries, file)
+        for file in islice(remaining, PAGE_PREFETCH_COUNT)
+    )
+
+    try:
+        for future in pending:
+            future.result()
+    except Exception:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+    return _stream_health_information(executor, pending, remaining)
+
+
+def _stream_health_information(executor, pending, remaining):
+    yield b'{"data":['
+
+    with executor:
+        is_first = True
+
+        while pending:
+            try:
+                entries = pending.popleft().result()
+            except Exception:
+                # the response has started, it can only be cut short
+                logger.exception("Error while streaming health information")
+                raise
+
+            next_file = next(remaining, None)
+            if next_file is not None:
+                pending.append(executor.submit(page_entries, next_file))
+
+            if not entries:
+                continue
+
+            if not is_first:
+                yield b","
+            yield entries
+            is_first = False
+
+    yield b"]}"
+
+
+class HealthInformationViewSet(TransactionLogMixin, GenericViewSet):
     permission_classes = (IsAuthenticated,)
 
     def retrieve(self, request, pk):
-        files = FileUpload.objects.filter(
-            Q(internal_name__contains=f"{pk}.json") | Q(associating_id=pk),
-            file_type=FileUpload.FileType.ABDM_HEALTH_INFORMATION.value,
-            upload_completed=True,
+        try:
+            UUID(str(pk))
+        except ValueError:
+            pk = None
+
+        # pk is either a consent artefact's or a consent request's external id
+        pages = pk and list(
+            HealthInformationPage.objects.filter(
+                Q(consent_artefact__external_id=pk)
+                | Q(consent_artefact__consent_request__external_id=pk),
+                file__upload_completed=True,
+            )
+            .select_related("file", "consent_artefact")
+            .order_by("consent_artefact_id", "page_number", "file_id")
         )
+        files = pages and [page.file for page in pages]
 
-        if files.count() == 0:
+        if not files:
             return Response(
                 {"detail": "No Health Information found for the given id"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if files.count() == 1 and files.first().is_archived:
+        active_files = [file for file in files if not file.is_archived]
+
+        if len(active_files) == 0:
+            archived_file = files[0]
             return Response(
                 {
                     "is_archived": True,
-                    "archived_reason": files.first().archive_reason,
-                    "archived_time": files.first().archived_datetime,
-                    "detail": f"This file has been archived as { files.first().archive_reason} at { files.first().archived_datetime}",
+                    "archived_reason": archived_file.archive_reason,
+                    "archived_time": archived_file.archived_datetime,
+                    "detail": f"This file has been archived as {archived_file.archive_reason} at {archived_file.archived_datetime}",
                 },
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        files = files.filter(is_archived=False)
-
-        contents = []
-        for file in files:
-            if file.upload_completed:
-                _, content = file.file_contents()
-                contents.extend(content)
-
-        Transaction.objects.create(
+        transaction_log.log(
             reference_id=pk,  # consent_arefact.external_id | consent_request.external_id
             type=TransactionType.ACCESS_DATA,
             created_by=request.user,
         )
 
-        return Response({"data": json.loads(content)}, status=status.HTTP_200_OK)
+        version = health_information_cache.version(active_files)
+        content = health_information_cache.read(pk, version)
+        if content is None:
+            try:
+                pages_content = stream_health_information(active_files)
+            except Exception:
+                logger.exception("Error while reading health information of %s", pk)
+                return Response(
+                    {"detail": "Failed to read the Health Information"},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                )
+
+            content = health_information_cache.write_through(
+                pk,
+                version,
+                pages_content,
+                # cached no longer than the first of the artefacts expires
+                expires_at=min(
+                    (
+                        page.consent_artefact.expiry
+                        for page in pages
+                        if page.consent_artefact.expiry
+                    ),
+                    default=None,
+                ),
+            )
+
+        return StreamingHttpResponse(
+            content,
+            content_type="application/json",
+            status=status.HTTP_200_OK,
+        )
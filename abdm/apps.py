@@ -10,3 +10,7 @@ class AbdmConfig(AppConfig):
 
     def ready(self):
         import abdm.signals  # noqa F401
+        from abdm.service import instrumentation
+        from abdm.settings import plugin_settings as settings
+
+        instrumentation.configure(settings.ABDM_INSTRUMENTATION)
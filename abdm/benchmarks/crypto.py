@@ -0,0 +1,144 @@
+import base64
+import json
+import os
+from importlib import resources
+
+from abdm.benchmarks.utils import measure
+from abdm.utils.fidelius import (
+    CryptoController,
+    DecryptionRequest,
+    EncryptionRequest,
+    KeyMaterial,
+)
+
+KB = 1024
+MB = 1024 * KB
+
+PAYLOAD_SIZES = {
+    "1kb": KB,
+    "10kb": 10 * KB,
+    "100kb": 100 * KB,
+    "1mb": MB,
+    "10mb": 10 * MB,
+    "50mb": 50 * MB,
+}
+
+
+def load_vectors() -> dict:
+    """
+    Known answer vectors for fidelius, with the field names used by the
+    Fidelius CLI (senderNonce, requesterPublicKey, encryptedData, ...).
+    """
+    with resources.files("abdm.data").joinpath("fidelius_vectors.json").open() as f:
+        return json.load(f)
+
+
+def verify(vectors: dict | None = None) -> list[str]:
+    """
+    Checks key derivation, shared secrets, encryption and decryption against
+    the vectors and returns a line for every mismatch.
+    """
+    vectors = vectors or load_vectors()
+    failures = []
+
+    for index, vector in enumerate(vectors.get("key_materials", [])):
+        key_material = KeyMaterial.generate_for_private_key(
+            CryptoController.decode_base64_to_private_key(vector["privateKey"])
+        )
+        for field, expected in (
+            ("public_key", vector["publicKey"]),
+            ("x509_public_key", vector["x509PublicKey"]),
+        ):
+            if getattr(key_material, field) != expected:
+                failures.append(f"key_materials[{index}] {field}")
+
+    for index, vector in enumerate(vectors.get("shared_secrets", [])):
+        shared_secret = CryptoController.compute_shared_secret(
+            vector["privateKey"], vector["publicKey"]
+        )
+        if shared_secret != vector["sharedSecret"]:
+            failures.append(f"shared_secrets[{index}]")
+
+    for index, vector in enumerate(vectors.get("encryptions", [])):
+        encrypted_data = CryptoController.encrypt(
+            EncryptionRequest(
+                sender_nonce=vector["senderNonce"],
+                requester_nonce=vector["requesterNonce"],
+                sender_private_key=vector["senderPrivateKey"],
+                requester_public_key=vector["requesterPublicKey"],
+                string_to_encrypt=vector["stringToEncrypt"],
+            )
+        )
+        if encrypted_data != vector["encryptedData"]:
+            failures.append(f"encryptions[{index}] encrypt")
+
+        try:
+            decrypted_data = CryptoController.decrypt(
+                DecryptionRequest(
+                    sender_nonce=vector["senderNonce"],
+                    requester_nonce=vector["requesterNonce"],
+                    requester_private_key=vector["requesterPrivateKey"],
+                    sender_public_key=vector["senderPublicKey"],
+                    encrypted_data=vector["encryptedData"],
+                )
+            )
+        except (ValueError, UnicodeDecodeError):
+            decrypted_data = None
+
+        if decrypted_data != vector["stringToEncrypt"]:
+            failures.append(f"encryptions[{index}] decrypt")
+
+    return failures
+
+
+def run(sizes=None, repeat: int = 5) -> dict:
+    """
+    Benchmarks key pair generation, shared secret derivation, and encryption
+    and decryption of payloads of every size. Like in a transfer, every
+    encrypt and decrypt derives the shared secret and AES key again.
+    """
+    sender = KeyMaterial.generate()
+    requester = KeyMaterial.generate()
+
+    results = {
+        "crypto.key_material": measure(
+            lambda: KeyMaterial.generate().public_key, repeat=repeat
+        ),
+        "crypto.shared_secret": measure(
+            lambda: CryptoController.compute_shared_secret(
+                sender.private_key, requester.x509_public_key
+            ),
+            repeat=repeat,
+        ),
+    }
+
+    for size in sizes or PAYLOAD_SIZES:
+        length = PAYLOAD_SIZES[size]
+        # FHIR bundles are mostly ascii, base64 keeps the payload ascii
+        payload = base64.b64encode(os.urandom(length)).decode()[:length]
+
+        encryption_request = EncryptionRequest(
+            sender_nonce=sender.nonce,
+            requester_nonce=requester.nonce,
+            sender_private_key=sender.private_key,
+            requester_public_key=requester.x509_public_key,
+            string_to_encrypt=payload,
+        )
+        encrypted_data = CryptoController.encrypt(encryption_request)
+        decryption_request = DecryptionRequest(
+            sender_nonce=sender.nonce,
+            requester_nonce=requester.nonce,
+            requester_private_key=requester.private_key,
+            sender_public_key=sender.x509_public_key,
+            encrypted_data=encrypted_data,
+        )
+
+        for operation, func in (
+            ("encrypt", lambda: CryptoController.encrypt(encryption_request)),
+            ("decrypt", lambda: CryptoController.decrypt(decryption_request)),
+        ):
+            metrics = measure(func, repeat=repeat)
+            metrics["throughput"] = length / MB / metrics["time"]
+            results[f"crypto.{operation}.{size}"] = metrics
+
+    return results
@@ -0,0 +1,224 @@
+"""
+Synthetic consultations for benchmarks, built with the minimum of fields care
+needs rather than care's test utilities, which are not shipped with it in
+production. Meant to be used inside a transaction that is rolled back.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from django.utils import timezone
+
+from abdm.models import AbhaNumber
+from care.facility.models import (
+    ConditionVerificationStatus,
+    ConsultationDiagnosis,
+    DailyRound,
+    InvestigationSession,
+    InvestigationValue,
+    Facility,
+    MedibaseMedicine,
+    PatientConsultation,
+    PatientInvestigation,
+    PatientRegistration,
+    Prescription,
+    SuggestionChoices,
+)
+from care.facility.models.icd11_diagnosis import ICD11Diagnosis
+from care.users.models import District, LocalBody, State, User
+
+SIZES = {
+    "op_visit": {
+        "days": 0,
+        "daily_rounds": 1,
+        "prescriptions": 3,
+        "diagnoses": 1,
+        "procedures": 0,
+        "investigation_sessions": 1,
+        "investigation_values": 5,
+    },
+    "icu_30_days": {
+        "days": 30,
+        "daily_rounds": 30 * 4,
+        "prescriptions": 90,
+        "diagnoses": 8,
+        "procedures": 5,
+        "investigation_sessions": 30,
+        "investigation_values": 20,
+    },
+    "lab_panel_500": {
+        "days": 1,
+        "daily_rounds": 1,
+        "prescriptions": 1,
+        "diagnoses": 1,
+        "procedures": 0,
+        "investigation_sessions": 1,
+        "investigation_values": 500,
+    },
+}
+
+
+def create_facility():
+    """
+    Returns a user and the facility they created, in a new state, district and
+    local body.
+    """
+    suffix = uuid4().hex[:12]
+    state = State.objects.create(name=f"Benchmark state {suffix}")
+    district = District.objects.create(state=state, name=f"Benchmark {suffix}")
+    local_body = LocalBody.objects.create(
+        name=f"Benchmark local body {suffix}",
+        body_type=1,
+        localbody_code=suffix,
+        district=district,
+    )
+    user = User.objects.create_user(
+        username=f"benchmark-{suffix}",
+        user_type=User.TYPE_VALUE_MAP["Doctor"],
+        state=state,
+        district=district,
+        local_body=local_body,
+        phone_number="+919999999999",
+        gender=1,
+        date_of_birth=date(1980, 1, 1),
+    )
+    facility = Facility.objects.create(
+        name=f"Benchmark facility {suffix}",
+        facility_type=1,
+        address="Benchmark address",
+        pincode=682001,
+        phone_number="+919999999999",
+        state=state,
+        district=district,
+        local_body=local_body,
+        created_by=user,
+    )
+
+    return user, facility
+
+
+def create_patient(facility: Facility):
+    return PatientRegistration.objects.create(
+        facility=facility,
+        name=f"Benchmark patient {uuid4().hex[:8]}",
+        gender=1,
+        date_of_birth=date(1980, 1, 1),
+        phone_number="+919999999999",
+        emergency_phone_number="+919999999999",
+        address="Benchmark address",
+        pincode=682001,
+        state=facility.state,
+        district=facility.district,
+        local_body=facility.local_body,
+        is_antenatal=False,
+    )
+
+
+def create_consultation(size: str):
+    """
+    Returns a consultation with the daily rounds, prescriptions, diagnoses,
+    procedures and investigations of the given size in SIZES.
+    """
+    spec = SIZES[size]
+    now = timezone.now()
+    encounter_date = now - timedelta(days=spec["days"])
+
+    user, facility = create_facility()
+    patient = create_patient(facility)
+    AbhaNumber.objects.create(
+        patient=patient,
+        abha_number=f"91-{uuid4().int % 10**12:012d}",
+        health_id=f"benchmark-{uuid4().hex[:12]}@sbx",
+        name=patient.name,
+        date_of_birth="1980-01-01",
+    )
+
+    consultation = PatientConsultation.objects.create(
+        patient=patient,
+        facility=facility,
+        created_by=user,
+        suggestion=SuggestionChoices.A,
+        encounter_date=encounter_date,
+        discharge_date=now if spec["days"] else None,
+        treatment_plan="Continue current management",
+        consultation_notes="Patient is stable",
+        procedure=[
+            {
+                "procedure": f"Procedure {index}",
+                "repetitive": index % 2 == 0,
+                "frequency": "4 hours",
+                "time": encounter_date.strftime("%Y-%m-%dT%H:%M"),
+                "notes": "",
+            }
+            for index in range(spec["procedures"])
+        ],
+    )
+    patient.last_consultation = consultation
+    patient.save(update_fields=["last_consultation"])
+
+    DailyRound.objects.bulk_create(
+        DailyRound(
+            consultation=consultation,
+            created_by=user,
+            taken_at=encounter_date + timedelta(hours=6 * index),
+            temperature=Decimal("98.6"),
+            pulse=80,
+            resp=18,
+            bp={"systolic": 120, "diastolic": 80, "mean": 93.3},
+            ventilator_spo2=98,
+            ventilator_fio2=40,
+            ventilator_peep=5,
+        )
+        for index in range(spec["daily_rounds"])
+    )
+
+    medicine = MedibaseMedicine.objects.create(
+        name=f"Benchmark medicine {uuid4().hex[:8]}", type="brand"
+    )
+    Prescription.objects.bulk_create(
+        Prescription(
+            consultation=consultation,
+            medicine=medicine,
+            base_dosage="500 mg",
+            frequency="BD",
+            days=5,
+            route="ORAL",
+            notes="After food" if index % 2 else "",
+            prescribed_by=user,
+        )
+        for index in range(spec["prescriptions"])
+    )
+
+    ConsultationDiagnosis.objects.bulk_create(
+        ConsultationDiagnosis(
+            consultation=consultation,
+            diagnosis=diagnosis,
+            verification_status=ConditionVerificationStatus.CONFIRMED,
+            created_by=user,
+        )
+        # diagnoses need the ICD11 table to be loaded
+        for diagnosis in ICD11Diagnosis.objects.all()[: spec["diagnoses"]]
+    )
+
+    investigations = PatientInvestigation.objects.bulk_create(
+        PatientInvestigation(
+            name=f"Benchmark investigation {index}",
+            unit="mg/dL",
+            investigation_type="Float",
+        )
+        for index in range(spec["investigation_values"])
+    )
+    for _ in range(spec["investigation_sessions"]):
+        session = InvestigationSession.objects.create(created_by=user)
+        InvestigationValue.objects.bulk_create(
+            InvestigationValue(
+                investigation=investigation,
+                session=session,
+                consultation=consultation,
+                value=float(index),
+            )
+            for index, investigation in enumerate(investigations)
+        )
+
+    return consultation
@@ -0,0 +1,53 @@
+from django.db import transaction
+
+from abdm.benchmarks.factories import SIZES, create_consultation
+from abdm.benchmarks.utils import measure
+from abdm.utils.fhir_v1 import Fhir
+from care.facility.models import DailyRound, InvestigationValue, Prescription
+
+# record type -> callable building its bundle from a consultation, the same way
+# data_flow__health_information__transfer does for a care context
+RECORDS = {
+    "wellness": lambda consultation: Fhir().create_wellness_record(
+        DailyRound.objects.filter(consultation=consultation)
+        .order_by("-taken_at")
+        .first()
+    ),
+    "diagnostic_report": lambda consultation: Fhir().create_diagnostic_report_record(
+        InvestigationValue.objects.filter(consultation=consultation)
+        .select_related("session")
+        .first()
+        .session
+    ),
+    "prescription": lambda consultation: Fhir().create_prescription_record(
+        list(Prescription.objects.filter(consultation=consultation))
+    ),
+    "discharge_summary": lambda consultation: (
+        Fhir().create_discharge_summary_record(consultation)
+    ),
+    "op_consultation": lambda consultation: Fhir().create_op_consultation_record(
+        consultation
+    ),
+}
+
+
+def run(sizes=None, records=None, repeat: int = 5) -> dict:
+    """
+    Benchmarks building and serialising every record type for consultations of
+    every size. The synthetic data is rolled back afterwards.
+    """
+    results = {}
+
+    with transaction.atomic():
+        for size in sizes or SIZES:
+            consultation = create_consultation(size)
+
+            for record in records or RECORDS:
+                results[f"fhir.{size}.{record}"] = measure(
+                    lambda build=RECORDS[record]: build(consultation).json(),
+                    repeat=repeat,
+                )
+
+        transaction.set_rollback(True)
+
+    return results
@@ -0,0 +1,95 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def measure(func, repeat: int = 5, warmup: int = 1) -> dict:
+    """
+    Runs func and returns its median and best wall time in seconds, the
+    number of queries and the peak memory in bytes of a single run, and the
+    size in bytes of what it returned (len of it, or of its utf-8 encoding).
+    """
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    with CaptureQueriesContext(connection) as queries:
+        tracemalloc.start()
+        try:
+            result = func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    if isinstance(result, str):
+        result = result.encode("utf-8")
+
+    return {
+        "time": statistics.median(timings),
+        "time_min": min(timings),
+        "queries": len(queries),
+        "memory": peak,
+        "size": len(result) if result is not None else 0,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Returns a line for every metric that regressed by more than threshold
+    (a fraction) from the baseline. Any increase in queries is a regression.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+
+        for metric in ("time", "memory", "size", "queries"):
+            before, after = previous.get(metric), metrics.get(metric)
+            if before is None or after is None:
+                continue
+
+            allowed = before if metric == "queries" else before * (1 + threshold)
+            if after > allowed:
+                regressions.append(f"{name} {metric}: {before} -> {after}")
+
+    return regressions
+
+
+def table(results: dict) -> str:
+    lines = [
+        f"{'benchmark':<48} {'time (ms)':>10} {'min (ms)':>10} {'queries':>8} "
+        f"{'memory (KiB)':>13} {'size (KiB)':>11} {'MB/s':>9}"
+    ]
+    for name, metrics in results.items():
+        lines.append(
+            f"{name:<48} {metrics['time'] * 1000:>10.2f} "
+            f"{metrics['time_min'] * 1000:>10.2f} {metrics['queries']:>8} "
+            f"{metrics['memory'] / 1024:>13.1f} {metrics['size'] / 1024:>11.1f} "
+            + (
+                f"{metrics['throughput']:>9.1f}"
+                if "throughput" in metrics
+                else f"{'':>9}"
+            )
+        )
+
+    return "\n".join(lines)
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def dump(results: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
@@ -0,0 +1,191 @@
+import logging
+import threading
+
+from django.conf import settings as django_settings
+from django.core.management.base import BaseCommand, CommandError
+
+from abdm.models import AbhaNumber, ConsentArtefact, HealthInformationType, Transaction
+from abdm.settings import plugin_settings as settings
+from abdm.simulator.driver import LoadDriver, SimulatedPatient
+from abdm.simulator.gateway import GatewaySimulator, SimulatorConfig
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a local stand-in for the ABDM gateway and consent manager, and "
+        "optionally load tests the plugin's HIP flows against it"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8090)
+        parser.add_argument(
+            "--callback-url",
+            default=f"{settings.BACKEND_DOMAIN}/api/abdm",
+            help="base url the plugin's callback routes are served under",
+        )
+        parser.add_argument(
+            "--cm-id",
+            default="simulator",
+            help="consent manager id, stored as the cm of the consent artefacts "
+            "the simulator grants",
+        )
+        parser.add_argument("--latency", type=float, default=0, help="seconds")
+        parser.add_argument("--jitter", type=float, default=0, help="seconds")
+        parser.add_argument("--error-rate", type=float, default=0)
+        parser.add_argument("--error-status", type=int, default=500)
+        parser.add_argument("--callback-delay", type=float, default=0)
+        parser.add_argument(
+            "--no-auto-grant",
+            action="store_true",
+            help="leave consent requests REQUESTED instead of granting them",
+        )
+        parser.add_argument(
+            "--cycles",
+            type=int,
+            default=0,
+            help="discover, link, consent and health information cycles to run, "
+            "serves until interrupted if 0",
+        )
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--patients",
+            type=int,
+            default=10,
+            help="patients with an ABHA number at a registered facility to cycle",
+        )
+        parser.add_argument(
+            "--hi-type",
+            action="append",
+            choices=HealthInformationType.values,
+            help="health information types to request consent for",
+        )
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument(
+            "--verify-data",
+            action="store_true",
+            help="decrypt the pushed health information",
+        )
+        parser.add_argument(
+            "--allow-db",
+            action="store_true",
+            help="run cycles against the database even though DEBUG is off",
+        )
+        parser.add_argument(
+            "--purge",
+            action="store_true",
+            help="delete the transactions and consent artefacts created by the "
+            "cycles once they are done",
+        )
+
+    def purge(self, driver: LoadDriver, cm_id: str) -> tuple[int, int]:
+        transactions, _ = Transaction.objects.filter(
+            reference_id__in=driver.ids
+        ).delete()
+        artefacts, _ = ConsentArtefact.objects.filter(
+            consent_id__in=driver.ids, cm=cm_id
+        ).delete()
+        return transactions, artefacts
+
+    def patients(self, count: int) -> list[SimulatedPatient]:
+        abha_numbers = AbhaNumber.objects.filter(
+            patient__isnull=False,
+            patient__facility__healthfacility__isnull=False,
+        ).select_related("patient__facility__healthfacility")[:count]
+
+        return [
+            SimulatedPatient(
+                abha_number=abha_number.abha_number,
+                health_id=abha_number.health_id,
+                name=abha_number.name or abha_number.patient.name,
+                gender=abha_number.gender
+                or {1: "M", 2: "F"}.get(abha_number.patient.gender, "O"),
+                year_of_birth=int(
+                    (abha_number.parsed_date_of_birth or "1990").split("-")[0]
+                ),
+                hf_id=abha_number.patient.facility.healthfacility.hf_id,
+            )
+            for abha_number in abha_numbers
+        ]
+
+    def handle(self, *args, **options):
+        if options["verbosity"] > 1:
+            logging.getLogger("abdm.simulator").setLevel(logging.DEBUG)
+
+        # cycles make the plugin create links, consent artefacts and
+        # transactions for real patients
+        if options["cycles"] and not (django_settings.DEBUG or options["allow_db"]):
+            raise CommandError(
+                "Refusing to run cycles against the database with DEBUG off, "
+                "pass --allow-db to run anyway"
+            )
+
+        simulator = GatewaySimulator(
+            SimulatorConfig(
+                callback_url=options["callback_url"].rstrip("/"),
+                cm_id=options["cm_id"],
+                latency=options["latency"],
+                jitter=options["jitter"],
+                error_rate=options["error_rate"],
+                error_status=options["error_status"],
+                callback_delay=options["callback_delay"],
+                auto_grant=not options["no_auto_grant"],
+            )
+        )
+        server = simulator.serve(options["host"], options["port"])
+        self.stdout.write(
+            f"Simulating ABDM at {simulator.url}, calling back {options['callback_url']}. "
+            "Point ABDM_GATEWAY_URL, ABDM_ABHA_URL and ABDM_FACILITY_URL of the "
+            "plugin under test at it."
+        )
+
+        if not options["cycles"]:
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                simulator.shutdown()
+            return
+
+        patients = self.patients(options["patients"])
+        if not patients:
+            simulator.shutdown()
+            raise CommandError(
+                "No patients with an ABHA number at a facility with a health "
+                "facility id to run cycles with"
+            )
+
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        driver = LoadDriver(
+            simulator,
+            patients,
+            hi_types=options["hi_type"]
+            or [
+                HealthInformationType.OP_CONSULTATION,
+                HealthInformationType.DISCHARGE_SUMMARY,
+                HealthInformationType.PRESCRIPTION,
+                HealthInformationType.DIAGNOSTIC_REPORT,
+                HealthInformationType.WELLNESS_RECORD,
+            ],
+            timeout=options["timeout"],
+            verify_data=options["verify_data"],
+        )
+        try:
+            report = driver.run(options["cycles"], options["concurrency"])
+        finally:
+            simulator.shutdown()
+
+        self.stdout.write(report.summary())
+
+        if options["purge"]:
+            transactions, artefacts = self.purge(driver, options["cm_id"])
+            self.stdout.write(
+                f"Purged {transactions} transactions and {artefacts} consent artefacts"
+            )
+        else:
+            self.stdout.write(
+                f"Consent artefacts granted by the simulator have cm "
+                f"{options['cm_id']!r}, pass --purge to delete what the cycles "
+                "created"
+            )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from abdm.benchmarks import crypto, utils
+
+
+class Command(BaseCommand):
+    help = (
+        "Checks fidelius against its known answer vectors and benchmarks key "
+        "generation, shared secrets, and encryption throughput"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size", action="append", choices=list(crypto.PAYLOAD_SIZES)
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--verify-only", action="store_true", help="only check the vectors"
+        )
+        parser.add_argument("--vectors", help="JSON vectors to check instead")
+        parser.add_argument("--output", help="write the results as JSON")
+        parser.add_argument("--baseline", help="JSON results to compare with")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="fraction by which time, memory or size may regress",
+        )
+
+    def handle(self, *args, **options):
+        vectors = utils.load(options["vectors"]) if options["vectors"] else None
+        failures = crypto.verify(vectors)
+        if failures:
+            raise CommandError("Vector mismatches:\n" + "\n".join(failures))
+
+        self.stdout.write(self.style.SUCCESS("Known answer vectors match"))
+
+        if options["verify_only"]:
+            return
+
+        results = crypto.run(sizes=options["size"], repeat=options["repeat"])
+        self.stdout.write(utils.table(results))
+
+        if options["output"]:
+            utils.dump(results, options["output"])
+
+        if options["baseline"]:
+            regressions = utils.compare(
+                results, utils.load(options["baseline"]), options["threshold"]
+            )
+            if regressions:
+                raise CommandError("Regressions:\n" + "\n".join(regressions))
+
+            self.stdout.write(self.style.SUCCESS("No regressions"))
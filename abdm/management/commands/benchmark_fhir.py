@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from abdm.benchmarks import fhir, utils
+from abdm.benchmarks.factories import SIZES
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks FHIR bundle generation for synthetic consultations of "
+        "several sizes, optionally against a baseline from a previous run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", action="append", choices=list(SIZES))
+        parser.add_argument("--record", action="append", choices=list(fhir.RECORDS))
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", help="write the results as JSON")
+        parser.add_argument("--baseline", help="JSON results to compare with")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="fraction by which time, memory or size may regress",
+        )
+        parser.add_argument(
+            "--allow-db",
+            action="store_true",
+            help="run against the database even though DEBUG is off",
+        )
+
+    def handle(self, *args, **options):
+        # the synthetic data is rolled back, but is still written to the
+        # database and fires its signals meanwhile
+        if not (settings.DEBUG or options["allow_db"]):
+            raise CommandError(
+                "Refusing to write benchmark data with DEBUG off, "
+                "pass --allow-db to run anyway"
+            )
+
+        results = fhir.run(
+            sizes=options["size"], records=options["record"], repeat=options["repeat"]
+        )
+        self.stdout.write(utils.table(results))
+
+        if options["output"]:
+            utils.dump(results, options["output"])
+
+        if options["baseline"]:
+            regressions = utils.compare(
+                results, utils.load(options["baseline"]), options["threshold"]
+            )
+            if regressions:
+                raise CommandError("Regressions:\n" + "\n".join(regressions))
+
+            self.stdout.write(self.style.SUCCESS("No regressions"))
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-19 10:12
+
+import django.db.models.fields.json
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("abdm", "0016_transaction_status_alter_consentartefact_hi_types_and_more"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="transaction",
+            index=models.Index(
+                fields=["reference_id"], name="abdm_txn_reference_id_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="transaction",
+            index=models.Index(
+                fields=["type", "status"], name="abdm_txn_type_status_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="transaction",
+            index=models.Index(
+                django.db.models.fields.json.KeyTransform("hf_id", "meta_data"),
+                django.db.models.fields.json.KeyTransform("abha_number", "meta_data"),
+                name="abdm_txn_hf_id_abha_idx",
+            ),
+        ),
+    ]
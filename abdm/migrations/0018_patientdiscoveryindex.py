@@ -0,0 +1,104 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:03
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+def populate_patient_discovery_index(apps, schema_editor):
+    PatientRegistration = apps.get_model("facility", "PatientRegistration")
+    PatientDiscoveryIndex = apps.get_model("abdm", "PatientDiscoveryIndex")
+
+    batch = []
+    for patient in (
+        PatientRegistration.objects.filter(deleted=False)
+        .order_by("id")
+        .iterator(chunk_size=2000)
+    ):
+        year_of_birth = patient.year_of_birth
+        if not year_of_birth and patient.date_of_birth:
+            year_of_birth = patient.date_of_birth.year
+
+        batch.append(
+            PatientDiscoveryIndex(
+                patient_id=patient.id,
+                facility_id=patient.facility_id,
+                name=patient.name or "",
+                phone_number=patient.phone_number,
+                year_of_birth=year_of_birth,
+                gender=patient.gender,
+            )
+        )
+
+        if len(batch) >= 2000:
+            PatientDiscoveryIndex.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+
+    PatientDiscoveryIndex.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("facility", "0432_alter_fileupload_file_type"),
+        ("abdm", "0017_transaction_indexes"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.CreateModel(
+            name="PatientDiscoveryIndex",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.TextField()),
+                (
+                    "phone_number",
+                    models.CharField(blank=True, max_length=14, null=True),
+                ),
+                ("year_of_birth", models.IntegerField(blank=True, null=True)),
+                ("gender", models.IntegerField(blank=True, null=True)),
+                (
+                    "facility",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="facility.facility",
+                    ),
+                ),
+                (
+                    "patient",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="abdm_discovery_index",
+                        to="facility.patientregistration",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["name"],
+                        name="abdm_pdi_name_trgm_idx",
+                        opclasses=["gin_trgm_ops"],
+                    ),
+                    models.Index(
+                        fields=["facility", "phone_number", "year_of_birth"],
+                        name="abdm_pdi_facility_phone_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(
+            code=populate_patient_discovery_index,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
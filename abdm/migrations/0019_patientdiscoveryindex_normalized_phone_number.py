@@ -0,0 +1,97 @@
+# Generated by Django 5.1.4 on 2026-10-19 11:41
+
+import re
+
+from django.db import migrations, models
+
+
+def normalize_phone_number(phone_number):
+    # copy of abdm.service.helper.normalize_phone_number at the time of writing
+    if not phone_number:
+        return None
+
+    digits = re.sub(r"\D", "", phone_number)
+    is_international = phone_number.strip().startswith("+")
+
+    if digits.startswith("00"):
+        digits = digits[2:]
+        is_international = True
+
+    if not is_international:
+        if len(digits) == 10:
+            return "+91" + digits
+
+        if len(digits) == 11 and digits.startswith("0"):
+            return "+91" + digits[1:]
+
+        if len(digits) == 12 and digits.startswith("91"):
+            return "+" + digits
+
+        return None
+
+    if 8 <= len(digits) <= 15:
+        return "+" + digits
+
+    return None
+
+
+def populate_normalized_phone_number(apps, schema_editor):
+    PatientDiscoveryIndex = apps.get_model("abdm", "PatientDiscoveryIndex")
+
+    batch = []
+    for entry in (
+        PatientDiscoveryIndex.objects.select_related("patient")
+        .order_by("id")
+        .iterator(chunk_size=2000)
+    ):
+        entry.normalized_phone_number = normalize_phone_number(
+            entry.patient.phone_number
+        )
+        batch.append(entry)
+
+        if len(batch) >= 2000:
+            PatientDiscoveryIndex.objects.bulk_update(
+                batch, ["normalized_phone_number"]
+            )
+            batch = []
+
+    PatientDiscoveryIndex.objects.bulk_update(batch, ["normalized_phone_number"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("abdm", "0018_patientdiscoveryindex"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="patientdiscoveryindex",
+            name="abdm_pdi_facility_phone_idx",
+        ),
+        migrations.RemoveField(
+            model_name="patientdiscoveryindex",
+            name="phone_number",
+        ),
+        migrations.AddField(
+            model_name="patientdiscoveryindex",
+            name="normalized_phone_number",
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+        migrations.RunPython(
+            code=populate_normalized_phone_number,
+            reverse_code=migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name="patientdiscoveryindex",
+            index=models.Index(
+                fields=["facility", "normalized_phone_number", "year_of_birth"],
+                name="abdm_pdi_fac_phone_yob_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patientdiscoveryindex",
+            index=models.Index(
+                fields=["normalized_phone_number"], name="abdm_pdi_phone_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.1.4 on 2026-10-19 12:37
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# FileUpload.FileType.ABDM_HEALTH_INFORMATION as of facility 0432
+ABDM_HEALTH_INFORMATION_FILE_TYPE = 8
+
+# "{pageNumber} / {pageCount} -- {artefact_id}.json" or "{artefact_id}.json"
+INTERNAL_NAME_PATTERN = re.compile(r"^(?:(\d+) / (\d+) -- )?([0-9a-fA-F-]{36})\.json$")
+
+
+def populate_health_information_pages(apps, schema_editor):
+    FileUpload = apps.get_model("facility", "FileUpload")
+    ConsentArtefact = apps.get_model("abdm", "ConsentArtefact")
+    HealthInformationPage = apps.get_model("abdm", "HealthInformationPage")
+
+    artefact_ids = dict(ConsentArtefact.objects.values_list("external_id", "id"))
+    artefact_ids = {str(key): value for key, value in artefact_ids.items()}
+
+    batch = []
+    for file in (
+        FileUpload.objects.filter(file_type=ABDM_HEALTH_INFORMATION_FILE_TYPE)
+        .only("id", "internal_name")
+        .order_by("id")
+        .iterator(chunk_size=2000)
+    ):
+        match = INTERNAL_NAME_PATTERN.match(file.internal_name or "")
+        artefact_id = match and artefact_ids.get(match.group(3).lower())
+        if not artefact_id:
+            continue
+
+        batch.append(
+            HealthInformationPage(
+                consent_artefact_id=artefact_id,
+                file_id=file.id,
+                page_number=int(match.group(1) or 1),
+                page_count=int(match.group(2) or 1),
+            )
+        )
+
+        if len(batch) >= 2000:
+            HealthInformationPage.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+
+    HealthInformationPage.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("facility", "0432_alter_fileupload_file_type"),
+        ("abdm", "0019_patientdiscoveryindex_normalized_phone_number"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HealthInformationPage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("page_number", models.PositiveIntegerField(default=1)),
+                ("page_count", models.PositiveIntegerField(default=1)),
+                (
+                    "consent_artefact",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="health_information_pages",
+                        to="abdm.consentartefact",
+                    ),
+                ),
+                (
+                    "file",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="abdm_health_information_page",
+                        to="facility.fileupload",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["consent_artefact", "page_number"],
+                        name="abdm_hi_page_artefact_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(
+            code=populate_health_information_pages,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-19 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("abdm", "0020_healthinformationpage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="KeyMaterialPool",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("algorithm", models.CharField(default="ECDH", max_length=20)),
+                ("curve", models.CharField(default="Curve25519", max_length=20)),
+                ("public_key", models.TextField()),
+                ("encrypted_private_key", models.TextField()),
+                ("nonce", models.TextField()),
+                ("created_date", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-19 13:48
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("abdm", "0021_keymaterialpool"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="consentrequest",
+            index=models.Index(
+                fields=["status", "modified_date"],
+                name="abdm_cr_status_modified_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-19 14:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("abdm", "0022_consentrequest_status_modified_idx"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="consentartefact",
+            index=models.Index(
+                fields=["status", "expiry"],
+                name="abdm_ca_status_expiry_idx",
+            ),
+        ),
+    ]
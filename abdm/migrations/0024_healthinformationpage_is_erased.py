@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("abdm", "0023_consentartefact_status_expiry_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="healthinformationpage",
+            name="is_erased",
+            field=models.BooleanField(default=False),
+        ),
+    ]
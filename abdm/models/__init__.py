@@ -1,4 +1,7 @@
 from .abha_number import *  # noqa
 from .consent import *  # noqa
 from .health_facility import *  # noqa
+from .health_information import *  # noqa
+from .key_material import *  # noqa
+from .patient_discovery import *  # noqa
 from .transaction import *  # noqa
@@ -7,7 +7,8 @@ from abdm.models.base import (
     Status,
 )
 from abdm.models.json_schema import CARE_CONTEXTS
-from abdm.utils.cipher import Cipher
+from abdm.models.key_material import KeyMaterialPool
+from abdm.utils.health_information_cache import health_information_cache
 from django.contrib.postgres.fields import ArrayField
 from django.core.validators import MinValueValidator
 from django.db import models
@@ -96,12 +97,28 @@ class Consent(BaseModel):
 
 
 class ConsentRequest(Consent):
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "modified_date"],
+                name="abdm_cr_status_modified_idx",
+            ),
+        ]
+
     @property
     def request_id(self):
         return self.consent_id
 
 
 class ConsentArtefact(Consent):
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "expiry"],
+                name="abdm_ca_status_expiry_idx",
+            ),
+        ]
+
     @property
     def artefact_id(self):
         return self.external_id
@@ -110,31 +127,94 @@ class ConsentArtefact(Consent):
     def transaction_id(self):
         return self.consent_id
 
+    @staticmethod
+    def generate_key_materials(count: int) -> list[dict]:
+        # generate inline only for what the pool could not hand out
+        key_materials = KeyMaterialPool.take(count)
+        for _ in range(count - len(key_materials)):
+            key_materials.append(KeyMaterialPool.generate())
+
+        return key_materials
+
+    @classmethod
+    def archive_health_information(cls, artefacts, reason: str):
+        FileUpload.objects.filter(
+            abdm_health_information_page__consent_artefact__in=[
+                artefact.pk for artefact in artefacts
+            ],
+            is_archived=False,
+        ).update(
+            is_archived=True,
+            archived_datetime=timezone.now(),
+            archive_reason=reason,
+        )
+
+        for artefact in artefacts:
+            artefact.invalidate_health_information_cache()
+
+    @classmethod
+    def bulk_upsert(cls, consent_request: ConsentRequest, artefact_ids, status: str):
+        """
+        Creates the missing artefacts of a consent request and moves the
+        existing ones to the given status with a constant number of queries.
+        """
+        artefact_ids = list(
+            dict.fromkeys(str(artefact_id) for artefact_id in artefact_ids)
+        )
+
+        existing_artefacts = list(
+            cls.objects.filter(external_id__in=artefact_ids).select_related(
+                "consent_request"
+            )
+        )
+        existing_ids = {str(artefact.external_id) for artefact in existing_artefacts}
+        missing_ids = [
+            artefact_id
+            for artefact_id in artefact_ids
+            if artefact_id not in existing_ids
+        ]
+
+        consent_details = {**consent_request.consent_details_dict(), "status": status}
+        created_artefacts = cls.objects.bulk_create(
+            [
+                cls(
+                    external_id=artefact_id,
+                    consent_request=consent_request,
+                    **consent_details,
+                    **key_material,
+                )
+                for artefact_id, key_material in zip(
+                    missing_ids, cls.generate_key_materials(len(missing_ids))
+                )
+            ]
+        )
+
+        if existing_artefacts:
+            cls.objects.filter(
+                id__in=[artefact.id for artefact in existing_artefacts]
+            ).update(status=status, modified_date=timezone.now())
+
+            if status in [Status.REVOKED.value, Status.EXPIRED.value]:
+                cls.archive_health_information(existing_artefacts, status)
+
+        return existing_artefacts + created_artefacts
+
     def save(self, *args, **kwargs):
         if self.key_material_private_key is None:
-            cipher = Cipher("", "")
-            key_material = cipher.generate_key_pair()
-
-            self.key_material_algorithm = "ECDH"
-            self.key_material_curve = "Curve25519"
-            self.key_material_public_key = key_material["publicKey"]
-            self.key_material_private_key = key_material["privateKey"]
-            self.key_material_nonce = key_material["nonce"]
-
-        if self.status in [Status.REVOKED.value, Status.EXPIRED.value]:
-            file = FileUpload.objects.filter(
-                internal_name__contains=f"{self.external_id}.json",
-                file_type=FileUpload.FileType.ABDM_HEALTH_INFORMATION.value,
-            ).first()
-
-            if file:
-                file.is_archived = True
-                file.archived_datetime = timezone.now()
-                file.archive_reason = self.status
-                file.save()
+            for field, value in self.generate_key_materials(1)[0].items():
+                setattr(self, field, value)
+
+        if self.pk and self.status in [Status.REVOKED.value, Status.EXPIRED.value]:
+            self.archive_health_information([self], self.status)
 
         return super().save(*args, **kwargs)
 
+    def invalidate_health_information_cache(self):
+        health_information_cache.invalidate(self.external_id)
+
+        if self.consent_request_id:
+            health_information_cache.invalidate(self.consent_request.external_id)
+
     consent_request = models.ForeignKey(
         ConsentRequest,
         on_delete=models.PROTECT,
@@ -1,12 +1,14 @@
-from django.core.paginator import Paginator
 from django.db import models, transaction
-from django.db.models import F, Func, Value
+from django.db.models import F, Func, Subquery, Value
 
 from abdm.models.permissions.health_facility import HealthFacilityPermissions
 from abdm.models.transaction import Transaction, TransactionStatus, TransactionType
 from abdm.service.helper import ABDMAPIException
 from care.utils.models.base import BaseModel
 
+# hf_id rewrites touching more transactions than this are moved to a celery task
+HF_ID_INLINE_UPDATE_LIMIT = 1000
+
 
 class HealthFacility(BaseModel, HealthFacilityPermissions):
     hf_id = models.CharField(max_length=50, unique=True)
@@ -15,23 +17,26 @@ class HealthFacility(BaseModel, HealthFacilityPermissions):
         "facility.Facility", on_delete=models.PROTECT, to_field="external_id"
     )
 
-    def _update_hf_id_in_transactions(
-        self, old_hf_id: str, new_hf_id: str, batch_size: int = 1000
-    ):
-        qs = Transaction.objects.filter(
+    @staticmethod
+    def _pending_link_transactions(hf_id: str):
+        return Transaction.objects.filter(
             type=TransactionType.LINK_CARE_CONTEXT,
-            meta_data__hf_id=old_hf_id,
+            meta_data__hf_id=hf_id,
             status__in=[TransactionStatus.INITIATED, TransactionStatus.FAILED],
         )
 
-        paginator = Paginator(qs, batch_size)
+    @staticmethod
+    def _update_hf_id_in_transactions(
+        old_hf_id: str, new_hf_id: str, batch_size: int = 1000, on_progress=None
+    ):
+        qs = HealthFacility._pending_link_transactions(old_hf_id)
         total_updated = 0
 
-        for page_num in paginator.page_range:
-            page = paginator.page(page_num)
-            transaction_ids = [tx.id for tx in page]
-
-            updated = Transaction.objects.filter(id__in=transaction_ids).update(
+        # updated rows stop matching qs, so each chunk picks up where the last one ended
+        while True:
+            updated = Transaction.objects.filter(
+                id__in=Subquery(qs.order_by("id").values("id")[:batch_size])
+            ).update(
                 meta_data=Func(
                     F("meta_data"),
                     Value("{hf_id}"),
@@ -42,6 +47,12 @@ class HealthFacility(BaseModel, HealthFacilityPermissions):
 
             total_updated += updated
 
+            if on_progress:
+                on_progress(total_updated)
+
+            if updated < batch_size:
+                break
+
         return total_updated
 
     def save(self, *args, **kwargs):
@@ -49,14 +60,32 @@ class HealthFacility(BaseModel, HealthFacilityPermissions):
             if self.pk:
                 old_instance = HealthFacility.objects.get(pk=self.pk)
                 if old_instance.hf_id != self.hf_id:
-                    try:
-                        self._update_hf_id_in_transactions(
-                            old_instance.hf_id, self.hf_id, batch_size=1000
+                    old_hf_id, new_hf_id = old_instance.hf_id, self.hf_id
+                    pending = (
+                        self._pending_link_transactions(old_hf_id)
+                        .values("id")[: HF_ID_INLINE_UPDATE_LIMIT + 1]
+                        .count()
+                    )
+
+                    if pending > HF_ID_INLINE_UPDATE_LIMIT:
+                        from abdm.tasks.update_hf_id_in_transactions import (
+                            update_hf_id_in_transactions,
+                        )
+
+                        transaction.on_commit(
+                            lambda: update_hf_id_in_transactions.delay(
+                                old_hf_id, new_hf_id
+                            )
                         )
-                    except Exception as e:
-                        raise ABDMAPIException(
-                            detail="Failed to update transactions for hf_id change"
-                        ) from e
+                    else:
+                        try:
+                            self._update_hf_id_in_transactions(
+                                old_hf_id, new_hf_id, batch_size=1000
+                            )
+                        except Exception as e:
+                            raise ABDMAPIException(
+                                detail="Failed to update transactions for hf_id change"
+                            ) from e
             super().save(*args, **kwargs)
 
     def __str__(self):
@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class HealthInformationPage(models.Model):
+    """
+    Maps a page of health information received on the HIU side to the consent
+    artefact it was transferred for and the FileUpload it was stored in.
+    """
+
+    consent_artefact = models.ForeignKey(
+        "abdm.ConsentArtefact",
+        on_delete=models.CASCADE,
+        related_name="health_information_pages",
+    )
+    file = models.OneToOneField(
+        "facility.FileUpload",
+        on_delete=models.CASCADE,
+        related_name="abdm_health_information_page",
+    )
+
+    page_number = models.PositiveIntegerField(default=1)
+    page_count = models.PositiveIntegerField(default=1)
+    # set once the stored object has been deleted from the bucket
+    is_erased = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["consent_artefact", "page_number"],
+                name="abdm_hi_page_artefact_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.page_number} / {self.page_count} -- {self.consent_artefact_id}"
@@ -41,6 +41,7 @@ SCAN_AND_SHARE = {
     "properties": {
         "abha_number": {"type": "string", "format": "uuid"},
         "is_existing_patient": {"type": "boolean"},
+        "matched_by": {"type": "string", "enum": ["ABHA", "DEMOGRAPHICS"]},
         "token": {"type": "string"},
     },
     "additionalProperties": False,
@@ -78,6 +79,14 @@ EXCHANGE_DATA = {
         "is_incoming": {
             "type": "boolean"
         },  # true if receiving data, false if sending data
+        "timings": {
+            "type": "object",
+            "additionalProperties": {"type": "number"},
+        },  # seconds spent in each stage of the transfer
+        "counts": {
+            "type": "object",
+            "additionalProperties": {"type": "integer"},
+        },
     },
     "additionalProperties": False,
     "required": ["consent_artefact", "is_incoming"],
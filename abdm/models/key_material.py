@@ -0,0 +1,112 @@
+import logging
+
+from django.db import models, transaction
+
+from abdm.utils.cipher import Cipher
+from abdm.utils.secret import decrypt, encrypt
+
+logger = logging.getLogger(__name__)
+
+KEY_MATERIAL_SECRET_PURPOSE = "key-material-pool"
+
+
+class KeyMaterialPool(models.Model):
+    """
+    Pre-generated ECDH key materials handed out to new consent artefacts, so
+    the keypair generation stays off the request path of CM callbacks.
+
+    Private keys are stored encrypted and a row is deleted once it is taken.
+    The pool is refilled by abdm.tasks.refill_key_material_pool.
+    """
+
+    algorithm = models.CharField(max_length=20, default="ECDH")
+    curve = models.CharField(max_length=20, default="Curve25519")
+    public_key = models.TextField()
+    encrypted_private_key = models.TextField()
+    nonce = models.TextField()
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.algorithm} {self.curve} {self.id}"
+
+    @staticmethod
+    def generate() -> dict:
+        key_material = Cipher("", "").generate_key_pair()
+
+        return {
+            "key_material_algorithm": "ECDH",
+            "key_material_curve": "Curve25519",
+            "key_material_public_key": key_material["publicKey"],
+            "key_material_private_key": key_material["privateKey"],
+            "key_material_nonce": key_material["nonce"],
+        }
+
+    @classmethod
+    def take(cls, count: int) -> list[dict]:
+        """
+        Removes up to count key materials from the pool and returns them in the
+        shape of ConsentArtefact's key material fields. Entries that no longer
+        decrypt (eg. after SECRET_KEY was rotated) are dropped from the pool and
+        not returned, so callers generate key materials for them instead.
+        """
+        if count <= 0:
+            return []
+
+        key_materials = []
+        with transaction.atomic():
+            entries = list(
+                cls.objects.select_for_update(skip_locked=True).order_by("id")[:count]
+            )
+
+            for entry in entries:
+                try:
+                    private_key = decrypt(
+                        entry.encrypted_private_key, KEY_MATERIAL_SECRET_PURPOSE
+                    )
+                except ValueError:
+                    logger.warning("Dropping undecryptable key material %s", entry.id)
+                    continue
+
+                key_materials.append(
+                    {
+                        "key_material_algorithm": entry.algorithm,
+                        "key_material_curve": entry.curve,
+                        "key_material_public_key": entry.public_key,
+                        "key_material_private_key": private_key,
+                        "key_material_nonce": entry.nonce,
+                    }
+                )
+
+            cls.objects.filter(id__in=[entry.id for entry in entries]).delete()
+
+        return key_materials
+
+    @classmethod
+    def refill(cls, size: int, batch_size: int = 50) -> int:
+        """
+        Tops the pool up to size entries and returns the number added.
+        """
+        missing = size - cls.objects.count()
+        added = 0
+
+        while added < missing:
+            entries = []
+            for _ in range(min(batch_size, missing - added)):
+                key_material = cls.generate()
+                entries.append(
+                    cls(
+                        algorithm=key_material["key_material_algorithm"],
+                        curve=key_material["key_material_curve"],
+                        public_key=key_material["key_material_public_key"],
+                        encrypted_private_key=encrypt(
+                            key_material["key_material_private_key"],
+                            KEY_MATERIAL_SECRET_PURPOSE,
+                        ),
+                        nonce=key_material["key_material_nonce"],
+                    )
+                )
+
+            cls.objects.bulk_create(entries)
+            added += len(entries)
+
+        return added
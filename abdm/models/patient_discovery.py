@@ -0,0 +1,146 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import models
+
+from abdm.service.helper import normalize_phone_number
+
+DISCOVERY_YEAR_OF_BIRTH_TOLERANCE = 5
+
+
+class PatientDiscoveryIndex(models.Model):
+    """
+    Denormalized projection of PatientRegistration used to answer user initiated
+    care context discovery within the gateway's timeout.
+
+    Rows are kept in sync with the patient by abdm.signals.patient_discovery.
+    """
+
+    patient = models.OneToOneField(
+        "facility.PatientRegistration",
+        on_delete=models.CASCADE,
+        related_name="abdm_discovery_index",
+    )
+    facility = models.ForeignKey(
+        "facility.Facility", on_delete=models.SET_NULL, null=True, blank=True
+    )
+
+    name = models.TextField()
+    normalized_phone_number = models.CharField(max_length=16, null=True, blank=True)
+    year_of_birth = models.IntegerField(null=True, blank=True)
+    gender = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["name"],
+                name="abdm_pdi_name_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+            models.Index(
+                fields=["facility", "normalized_phone_number", "year_of_birth"],
+                name="abdm_pdi_fac_phone_yob_idx",
+            ),
+            models.Index(
+                fields=["normalized_phone_number"],
+                name="abdm_pdi_phone_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.patient_id} {self.name}"
+
+    @staticmethod
+    def fields_from_patient(patient) -> dict:
+        year_of_birth = patient.year_of_birth
+        if not year_of_birth and patient.date_of_birth:
+            year_of_birth = patient.date_of_birth.year
+
+        return {
+            "facility_id": patient.facility_id,
+            "name": patient.name or "",
+            "normalized_phone_number": normalize_phone_number(patient.phone_number),
+            "year_of_birth": year_of_birth,
+            "gender": patient.gender,
+        }
+
+    @classmethod
+    def sync(cls, patient):
+        if patient.deleted:
+            cls.objects.filter(patient=patient).delete()
+            return
+
+        cls.objects.update_or_create(
+            patient=patient, defaults=cls.fields_from_patient(patient)
+        )
+
+    @classmethod
+    def find_patient(
+        cls,
+        name: str,
+        gender: int,
+        year_of_birth: int,
+        mobile: str | None,
+        hf_id: str | None = None,
+    ):
+        """
+        Returns the best matching patient by demographics, or None.
+
+        Candidates are pre-filtered on the indexed columns (facility, phone,
+        year of birth, trigram match on name) and then ranked by similarity.
+        """
+        phone_number = normalize_phone_number(mobile)
+        if not phone_number or not name or not year_of_birth:
+            return None
+
+        candidates = cls.objects.filter(
+            normalized_phone_number=phone_number,
+            year_of_birth__gte=year_of_birth - DISCOVERY_YEAR_OF_BIRTH_TOLERANCE,
+            year_of_birth__lte=year_of_birth + DISCOVERY_YEAR_OF_BIRTH_TOLERANCE,
+            gender=gender,
+            name__trigram_similar=name,
+        )
+
+        if hf_id:
+            candidates = candidates.filter(facility__healthfacility__hf_id=hf_id)
+
+        match = (
+            candidates.annotate(similarity=TrigramSimilarity("name", name))
+            .filter(similarity__gt=0.3)
+            .order_by("-similarity")
+            .select_related("patient")
+            .first()
+        )
+
+        return match.patient if match else None
+
+    @classmethod
+    def find_patient_without_abha_number(
+        cls,
+        name: str,
+        gender: int,
+        year_of_birth: int,
+        mobile: str | None,
+        facility,
+    ):
+        """
+        Returns the existing patient of the facility without an ABHA number
+        whose phone number, year of birth, gender and name exactly match the
+        given demographics, or None if there is no such patient or more than
+        one, as family members often share a phone number.
+        """
+        phone_number = normalize_phone_number(mobile)
+        if not phone_number or not name or not year_of_birth:
+            return None
+
+        matches = list(
+            cls.objects.filter(
+                facility=facility,
+                normalized_phone_number=phone_number,
+                year_of_birth=year_of_birth,
+                gender=gender,
+                name__iexact=name.strip(),
+                patient__abha_number__isnull=True,
+            ).select_related("patient")[:2]
+        )
+
+        return matches[0].patient if len(matches) == 1 else None
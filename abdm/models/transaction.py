@@ -1,5 +1,10 @@
+from functools import cache
+
 from django.db import models
-from jsonschema import validate
+from django.db.models.fields.json import KeyTransform
+from jsonschema import FormatChecker
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
 
 from abdm.models.json_schema.transaction import (
     CREATE_ABHA_ADDRESS,
@@ -9,7 +14,7 @@ from abdm.models.json_schema.transaction import (
     SCAN_AND_SHARE,
 )
 from care.users.models import User
-from care.utils.models.base import BaseModel
+from care.utils.models.base import BaseManager, BaseModel
 
 
 class TransactionType(models.IntegerChoices):
@@ -26,6 +31,54 @@ class TransactionStatus(models.IntegerChoices):
     FAILED = 3
     CANCELLED = 4
 
+
+META_DATA_SCHEMAS = {
+    TransactionType.CREATE_OR_LINK_ABHA_NUMBER: CREATE_OR_LINK_ABHA_NUMBER,
+    TransactionType.CREATE_ABHA_ADDRESS: CREATE_ABHA_ADDRESS,
+    TransactionType.SCAN_AND_SHARE: SCAN_AND_SHARE,
+    TransactionType.LINK_CARE_CONTEXT: LINK_CARE_CONTEXT,
+    TransactionType.EXCHANGE_DATA: EXCHANGE_DATA,
+}
+
+
+@cache
+def meta_data_validator(transaction_type: int):
+    """
+    Returns the compiled meta_data validator for the given transaction type,
+    or None if the type has no schema. Validators are built once per process.
+    """
+    schema = META_DATA_SCHEMAS.get(transaction_type)
+    if schema is None:
+        return None
+
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema, format_checker=FormatChecker())
+
+
+def validate_meta_data(transaction_type: int, meta_data):
+    validator = meta_data_validator(transaction_type)
+    if validator is None:
+        return
+
+    error = best_match(validator.iter_errors(meta_data))
+    if error is not None:
+        raise error
+
+
+class TransactionQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj._validate_meta_data()
+
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class TransactionManager(BaseManager.from_queryset(TransactionQuerySet)):
+    pass
+
+
 class Transaction(BaseModel):
     reference_id = models.CharField(
         max_length=100, null=False, blank=False
@@ -44,17 +97,21 @@ class Transaction(BaseModel):
 
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
 
+    objects = TransactionManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["reference_id"], name="abdm_txn_reference_id_idx"),
+            models.Index(fields=["type", "status"], name="abdm_txn_type_status_idx"),
+            models.Index(
+                KeyTransform("hf_id", "meta_data"),
+                KeyTransform("abha_number", "meta_data"),
+                name="abdm_txn_hf_id_abha_idx",
+            ),
+        ]
+
     def _validate_meta_data(self):
-        if self.type == TransactionType.CREATE_OR_LINK_ABHA_NUMBER:
-            validate(instance=self.meta_data, schema=CREATE_OR_LINK_ABHA_NUMBER)
-        elif self.type == TransactionType.CREATE_ABHA_ADDRESS:
-            validate(instance=self.meta_data, schema=CREATE_ABHA_ADDRESS)
-        elif self.type == TransactionType.SCAN_AND_SHARE:
-            validate(instance=self.meta_data, schema=SCAN_AND_SHARE)
-        elif self.type == TransactionType.LINK_CARE_CONTEXT:
-            validate(instance=self.meta_data, schema=LINK_CARE_CONTEXT)
-        elif self.type == TransactionType.EXCHANGE_DATA:
-            validate(instance=self.meta_data, schema=EXCHANGE_DATA)
+        validate_meta_data(self.type, self.meta_data)
 
     def save(self, *args, **kwargs):
         self._validate_meta_data()
@@ -0,0 +1,172 @@
+import re
+from uuid import UUID
+
+from django.core.cache import cache
+
+from abdm.models.abha_number import AbhaNumber
+from care.facility.models import PatientRegistration
+
+ABHA_IDENTIFIER_CACHE_KEY_PREFIX = "abdm_abha_identifier__"
+ABHA_IDENTIFIER_CACHE_TIMEOUT = 60
+
+HF_ID_CACHE_KEY_PREFIX = "abdm_patient_hf_id__"
+
+ABHA_NUMBER_PATTERN = re.compile(r"^\d{2}-?\d{4}-?\d{4}-?\d{4}$")
+
+
+def identifier_kind(identifier: str) -> tuple[str, str] | None:
+    """
+    Detects which AbhaNumber column an identifier refers to by its format and
+    returns (kind, canonical value), kind being abha_number, health_id or uuid.
+    """
+    identifier = str(identifier or "").strip()
+    if not identifier:
+        return None
+
+    if ABHA_NUMBER_PATTERN.match(identifier):
+        return "abha_number", identifier.replace("-", "")
+
+    if "@" in identifier:
+        return "health_id", identifier
+
+    try:
+        return "uuid", str(UUID(identifier))
+    except ValueError:
+        # ABHA addresses without the cm suffix
+        return "health_id", identifier
+
+
+def _cache_key(kind: str, value: str) -> str:
+    return f"{ABHA_IDENTIFIER_CACHE_KEY_PREFIX}{kind}__{value}"
+
+
+def _hyphenated_abha_number(digits: str) -> str:
+    return f"{digits[:2]}-{digits[2:6]}-{digits[6:10]}-{digits[10:]}"
+
+
+def _query(kind: str, value: str) -> AbhaNumber | None:
+    queryset = AbhaNumber.objects.select_related("patient")
+
+    if kind == "abha_number":
+        return queryset.filter(
+            abha_number__in=[value, _hyphenated_abha_number(value)]
+        ).first()
+
+    if kind == "health_id":
+        return queryset.filter(health_id=value).first()
+
+    # a uuid is either the abha number's or its patient's external id
+    return (
+        queryset.filter(external_id=value).first()
+        or queryset.filter(patient__external_id=value).first()
+    )
+
+
+def _resolve(identifier: str) -> tuple[dict | None, AbhaNumber | None]:
+    detected = identifier_kind(identifier)
+    if not detected:
+        return None, None
+
+    key = _cache_key(*detected)
+    resolved = cache.get(key)
+    if resolved:
+        return resolved, None
+
+    abha_number = _query(*detected)
+    if not abha_number:
+        return None, None
+
+    resolved = {
+        "abha_number_id": abha_number.id,
+        "patient_id": abha_number.patient_id,
+    }
+    cache.set(key, resolved, timeout=ABHA_IDENTIFIER_CACHE_TIMEOUT)
+
+    return resolved, abha_number
+
+
+def resolve(identifier: str) -> dict | None:
+    """
+    Resolves an ABHA number, ABHA address or external id to
+    {"abha_number_id", "patient_id"}, caching hits for a short while.
+    """
+    return _resolve(identifier)[0]
+
+
+def resolve_abha_number(identifier: str) -> AbhaNumber | None:
+    resolved, abha_number = _resolve(identifier)
+    if abha_number or not resolved:
+        return abha_number
+
+    return (
+        AbhaNumber.objects.filter(id=resolved["abha_number_id"])
+        .select_related("patient")
+        .first()
+    )
+
+
+def _hf_id_cache_key(patient_id: int) -> str:
+    return f"{HF_ID_CACHE_KEY_PREFIX}{patient_id}"
+
+
+def resolve_hf_id(patient_id: int) -> str | None:
+    """
+    Returns the hf_id of the health facility of the patient's last
+    consultation. Cached apart from resolve(), as only some callers need it.
+    """
+    key = _hf_id_cache_key(patient_id)
+    hf_id = cache.get(key)
+
+    if hf_id is None:
+        hf_id = (
+            PatientRegistration.objects.filter(id=patient_id)
+            .values_list(
+                "last_consultation__facility__healthfacility__hf_id", flat=True
+            )
+            .first()
+        ) or ""
+        cache.set(key, hf_id, timeout=ABHA_IDENTIFIER_CACHE_TIMEOUT)
+
+    return hf_id or None
+
+
+def invalidate_hf_id(patient_id: int):
+    cache.delete(_hf_id_cache_key(patient_id))
+
+
+def identifier_cache_keys(*identifiers) -> list[str]:
+    """
+    Returns the cache keys identifiers resolve through, built the same way as
+    resolve() does, so every spelling of an identifier maps to its key.
+    """
+    keys = []
+    for identifier in identifiers:
+        detected = identifier_kind(identifier)
+        if detected:
+            keys.append(_cache_key(*detected))
+
+    return keys
+
+
+def invalidate(abha_number: AbhaNumber, *previous_identifiers, patient_ids=()):
+    """
+    Drops the cached resolutions of the abha number's identifiers, and of the
+    identifiers it had before a change, which would otherwise keep resolving.
+    The external ids of the given patients are only looked up when passed,
+    as they only resolve differently once the abha number's patient changes.
+    """
+    identifiers = [
+        abha_number.external_id,
+        abha_number.abha_number,
+        abha_number.health_id,
+        *previous_identifiers,
+    ]
+
+    if patient_ids:
+        identifiers.extend(
+            PatientRegistration.objects.filter(id__in=patient_ids).values_list(
+                "external_id", flat=True
+            )
+        )
+
+    cache.delete_many(identifier_cache_keys(*identifiers))
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from weakref import WeakKeyDictionary
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from abdm.service import instrumentation, rate_limiter
+from abdm.service.circuit_breaker import circuit_breaker
+from abdm.service.request import ABDM_TOKEN_CACHE_KEY, ABDM_TOKEN_URL, Request
+from abdm.settings import plugin_settings as settings
+from abdm.utils.json_codec import dumpb
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+
+class AsyncRequest(Request):
+    """
+    asyncio counterpart of Request built on httpx, with the same headers,
+    token handling and response semantics. Responses expose status_code,
+    text, headers and json() like the ones returned by Request.
+    """
+
+    # httpx clients are bound to the event loop they were created on
+    _clients = WeakKeyDictionary()
+
+    @classmethod
+    async def client(cls):
+        if httpx is None:
+            raise ImportError("httpx is required for AsyncRequest")
+
+        loop = asyncio.get_running_loop()
+        if loop not in cls._clients:
+            client = httpx.AsyncClient(
+                timeout=settings.ABDM_REQUEST_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.ABDM_REQUEST_POOL_SIZE,
+                    max_keepalive_connections=settings.ABDM_REQUEST_POOL_SIZE,
+                ),
+            )
+            lifetime = cls._lifetime(loop, client)
+            await anext(lifetime)
+            cls._clients[loop] = (client, lifetime)
+
+        return cls._clients[loop][0]
+
+    @classmethod
+    async def _lifetime(cls, loop, client):
+        # finalized by the loop's shutdown_asyncgens, which asyncio.run (and so
+        # async_to_sync on a new loop) calls before closing it, so the client
+        # and its connections are closed with the loop they were bound to
+        try:
+            yield
+        finally:
+            cls._clients.pop(loop, None)
+            await client.aclose()
+
+    async def auth_header(self):
+        token = await cache.aget(ABDM_TOKEN_CACHE_KEY)
+        if not token:
+            data, headers = self.token_request()
+            response = await (await self.client()).post(
+                ABDM_TOKEN_URL, content=data, headers=headers
+            )
+
+            session = self.token_from_response(response)
+            if not session:
+                return None
+
+            token, expires_in = session
+            await cache.aset(ABDM_TOKEN_CACHE_KEY, token, expires_in)
+
+        return {"Authorization": f"Bearer {token}"}
+
+    async def headers(self, additional_headers=None, auth=None):
+        return {
+            "Content-Type": "application/json",
+            "Accept": "*/*",
+            **(additional_headers or {}),
+            **(self.user_header(auth) or {}),
+            **(await self.auth_header() or {}),
+        }
+
+    async def get(self, path, params=None, headers=None, auth=None):
+        return await self._send("GET", path, headers, auth, params=params)
+
+    async def post(self, path, data=None, headers=None, auth=None):
+        return await self._send("POST", path, headers, auth, content=dumpb(data))
+
+    async def _send(self, method, path, headers, auth, retry=True, **kwargs):
+        bucket = rate_limiter.bucket(self.family, path, headers)
+
+        # 429s are retried after the Retry-After they ask for
+        for attempt in range(settings.ABDM_RATE_LIMIT_RETRIES + 1):
+            # the limiter talks to redis synchronously, off the event loop
+            if rate_limiter.enabled():
+                await asyncio.sleep(
+                    await sync_to_async(rate_limiter.reserve, thread_sensitive=False)(
+                        bucket, sync=False
+                    )
+                )
+            response = await self._dispatch(method, path, headers, auth, **kwargs)
+
+            backoff = rate_limiter.retry_after(response)
+            # without the limiter, a 429 is handled like any other error
+            if (
+                backoff is None
+                or not rate_limiter.enabled()
+                or attempt == settings.ABDM_RATE_LIMIT_RETRIES
+            ):
+                break
+
+            if not await sync_to_async(rate_limiter.block, thread_sensitive=False)(
+                bucket, backoff
+            ):
+                if backoff > rate_limiter.max_wait(sync=False):
+                    raise rate_limiter.unavailable()
+
+                await asyncio.sleep(backoff)
+
+        # the cached token was rejected, retry once with a new one
+        if retry and self.is_token_rejected(response):
+            await cache.adelete(ABDM_TOKEN_CACHE_KEY)
+            return await self._send(method, path, headers, auth, retry=False, **kwargs)
+
+        return self._handle_response(response)
+
+    async def _dispatch(self, method, path, headers, auth, **kwargs):
+        breaker = circuit_breaker(self.family)
+        breaker.acquire()
+
+        trace = None
+        try:
+            request_headers = await self.headers(headers, auth)
+            if instrumentation.enabled():
+                trace = instrumentation.HttpxTrace(time.perf_counter())
+                kwargs["extensions"] = {"trace": trace}
+
+            response = await (await self.client()).request(
+                method,
+                self.url + path,
+                headers=request_headers,
+                **kwargs,
+            )
+        except Exception as e:
+            breaker.release(success=False)
+            if trace:
+                instrumentation.record(
+                    self.family,
+                    method,
+                    path,
+                    headers,
+                    trace.started,
+                    error=e,
+                    timings=trace.timings(),
+                )
+            raise
+
+        breaker.release(success=response.status_code < 500)
+        if trace:
+            instrumentation.record(
+                self.family,
+                method,
+                path,
+                headers,
+                trace.started,
+                response=response,
+                timings=trace.timings(),
+            )
+        return response
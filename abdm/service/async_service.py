@@ -0,0 +1,52 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from abdm.service.request import async_transport
+
+
+def _close_old_connections_after(method):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return wrapper
+
+
+class AsyncService:
+    """
+    Exposes the static methods of a service (GatewayService, HealthIdService,
+    FacilityService) as coroutines.
+
+    The method bodies run in a worker thread, so they keep their payload
+    building, database lookups and error handling, while their HTTP calls are
+    made with AsyncRequest on the caller's event loop. Independent calls can
+    be overlapped with asyncio.gather. The worker threads never see the end
+    of a request, so their database connections are closed (or kept, as
+    CONN_MAX_AGE allows) after every call, as a request's would be.
+    """
+
+    def __init__(self, service):
+        self.service = service
+
+    def __getattr__(self, name):
+        method = getattr(self.service, name)
+        if not callable(method):
+            return method
+
+        @wraps(method)
+        async def wrapper(*args, **kwargs):
+            token = async_transport.set(True)
+            try:
+                return await sync_to_async(
+                    _close_old_connections_after(method), thread_sensitive=False
+                )(*args, **kwargs)
+            finally:
+                async_transport.reset(token)
+
+        setattr(self, name, wrapper)
+        return wrapper
@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+
+from abdm.settings import plugin_settings as settings
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Per-process circuit breaker with an AIMD concurrency limit for a family of
+    ABDM endpoints (gateway, abha, facility).
+
+    The circuit opens after ABDM_CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive
+    failures (connection errors, timeouts and 5xx responses) and rejects calls
+    until ABDM_CIRCUIT_BREAKER_RECOVERY_TIMEOUT has passed. A single probe is
+    then let through (half-open), which closes the circuit on success and
+    re-opens it on failure.
+
+    The number of calls in flight is capped by a limit that grows by one per
+    limit successful calls and halves on every failure.
+    """
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    MIN_LIMIT = 1
+
+    def __init__(self, family: str):
+        self.family = family
+        self.lock = threading.Lock()
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.is_probing = False
+
+        self.limit = float(settings.ABDM_CONCURRENCY_LIMIT)
+        self.in_flight = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.ABDM_CIRCUIT_BREAKER_FAILURE_THRESHOLD > 0
+
+    def acquire(self):
+        if not self.enabled:
+            return
+
+        with self.lock:
+            if self.state == self.OPEN:
+                elapsed = time.monotonic() - self.opened_at
+                if elapsed < settings.ABDM_CIRCUIT_BREAKER_RECOVERY_TIMEOUT:
+                    self._reject("is not responding")
+
+                self.state = self.HALF_OPEN
+                self.is_probing = False
+
+            if self.state == self.HALF_OPEN:
+                if self.is_probing:
+                    self._reject("is recovering")
+
+                self.is_probing = True
+
+            if self.in_flight >= int(self.limit):
+                self.is_probing = False
+                self._reject("is overloaded")
+
+            self.in_flight += 1
+
+    def release(self, success: bool):
+        if not self.enabled:
+            return
+
+        with self.lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+            self.is_probing = False
+
+            if success:
+                self.failures = 0
+                self.limit = min(
+                    self.limit + 1 / self.limit, settings.ABDM_CONCURRENCY_LIMIT
+                )
+
+                if self.state == self.HALF_OPEN:
+                    logger.info("Circuit for ABDM %s closed", self.family)
+                    self.state = self.CLOSED
+
+                return
+
+            self.failures += 1
+            self.limit = max(self.limit / 2, self.MIN_LIMIT)
+
+            if (
+                self.state == self.HALF_OPEN
+                or self.failures >= settings.ABDM_CIRCUIT_BREAKER_FAILURE_THRESHOLD
+            ):
+                if self.state != self.OPEN:
+                    logger.warning(
+                        "Circuit for ABDM %s opened after %s failures",
+                        self.family,
+                        self.failures,
+                    )
+
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def _reject(self, reason: str):
+        from abdm.service.helper import ABDMServiceUnavailableException
+
+        raise ABDMServiceUnavailableException(
+            detail=f"ABDM {self.family} {reason}, please try again later"
+        )
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker(family: str) -> CircuitBreaker:
+    breaker = _breakers.get(family)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(family, CircuitBreaker(family))
+
+    return breaker
@@ -0,0 +1,144 @@
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+
+from abdm.settings import plugin_settings as settings
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("abdm_data_flow_trace", default=None)
+_tracer = None
+
+
+def tracer():
+    """
+    Returns an OpenTelemetry tracer if the opentelemetry exporter is enabled
+    in ABDM_INSTRUMENTATION and installed, otherwise None.
+    """
+    global _tracer
+
+    if _tracer is None:
+        _tracer = False
+        if "opentelemetry" in settings.ABDM_INSTRUMENTATION:
+            try:
+                from opentelemetry import trace
+
+                _tracer = trace.get_tracer("abdm")
+            except ImportError:
+                pass
+
+    return _tracer or None
+
+
+def _span(name: str, attributes: dict):
+    if otel := tracer():
+        return otel.start_as_current_span(name, attributes=attributes)
+
+    return nullcontext()
+
+
+class DataFlowTrace:
+    """
+    Timings of the stages of a health information transfer, keyed by its
+    transaction id. Time spent in a stage entered several times (eg. once per
+    care context) is summed up.
+    """
+
+    def __init__(self, transaction_id: str | None = None):
+        self.transaction_id = transaction_id
+        self.started = time.perf_counter()
+        self.timings = {}
+        self.counts = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            with _span(
+                f"abdm.data_flow.{name}",
+                {"abdm.transaction_id": self.transaction_id or ""},
+            ):
+                yield
+        finally:
+            self.timings[name] = (
+                self.timings.get(name, 0) + time.perf_counter() - started
+            )
+
+    def count(self, name: str, value: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_meta_data(self) -> dict:
+        return {
+            "timings": {
+                **{name: round(value, 6) for name, value in self.timings.items()},
+                "total": round(self.elapsed(), 6),
+            },
+            "counts": dict(self.counts),
+        }
+
+
+@contextmanager
+def trace(transaction_id: str | None = None):
+    """
+    Opens a trace that stage(), count() and traced() record into for the
+    current request or task.
+    """
+    instance = DataFlowTrace(transaction_id)
+    token = _current.set(instance)
+
+    try:
+        with _span("abdm.data_flow", {}) as span:
+            try:
+                yield instance
+            finally:
+                # the transaction id is only known once the request is validated
+                if span is not None:
+                    span.set_attribute(
+                        "abdm.transaction_id", instance.transaction_id or ""
+                    )
+    finally:
+        _current.reset(token)
+        logger.info(
+            "ABDM data flow %s took %.3fs: %s",
+            instance.transaction_id,
+            instance.elapsed(),
+            instance.as_meta_data(),
+        )
+
+
+def current() -> DataFlowTrace | None:
+    return _current.get()
+
+
+def stage(name: str):
+    instance = current()
+    if instance is None:
+        return nullcontext()
+
+    return instance.stage(name)
+
+
+def count(name: str, value: int = 1):
+    if instance := current():
+        instance.count(name, value)
+
+
+def traced(name: str):
+    """
+    Records calls of the decorated function as the given stage.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,3 +1,4 @@
+import re
 from base64 import b64decode, b64encode
 from datetime import UTC, datetime
 from uuid import uuid4
@@ -5,12 +6,11 @@ from uuid import uuid4
 from Crypto.Cipher import PKCS1_OAEP
 from Crypto.Hash import SHA1
 from Crypto.PublicKey import RSA
-from django.db.models import Q
 from django.db.models.functions import TruncDate
 from rest_framework.exceptions import APIException
 
-from abdm.models.abha_number import AbhaNumber
 from abdm.models.base import HealthInformationType
+from abdm.service import abha_resolver
 from abdm.service.request import Request
 from abdm.settings import plugin_settings as settings
 from care.facility.models import (
@@ -29,6 +29,12 @@ class ABDMAPIException(APIException):
     default_detail = "An error occured while trying to communicate with ABDM"
 
 
+class ABDMServiceUnavailableException(ABDMAPIException):
+    status_code = 503
+    default_code = "ABDM_UNAVAILABLE"
+    default_detail = "ABDM is currently unavailable, please try again later"
+
+
 class ABDMInternalException(APIException):
     status_code = 400
     default_code = "ABDM_INTERNAL_ERROR"
@@ -46,7 +52,7 @@ def uuid():
 def encrypt_message(message: str):
     rsa_public_key = RSA.importKey(
         b64decode(
-            Request(settings.ABDM_ABHA_URL)
+            Request(settings.ABDM_ABHA_URL, family="abha")
             .get(
                 "/v3/profile/public/certificate",
                 None,
@@ -64,24 +70,65 @@ def encrypt_message(message: str):
 
 
 def hf_id_from_abha_id(health_id: str):
-    abha_number = AbhaNumber.objects.filter(
-        Q(abha_number=health_id) | Q(health_id=health_id)
-    ).first()
-
-    if not abha_number:
-        ABDMInternalException(detail="Given ABHA Number does not exist in the system")
+    resolved = abha_resolver.resolve(health_id)
 
-    if not abha_number.patient:
-        ABDMInternalException(detail="Given ABHA Number is not linked to any patient")
+    if not resolved:
+        raise ABDMInternalException(
+            detail="Given ABHA Number does not exist in the system"
+        )
 
-    patient_facility = abha_number.patient.last_consultation.facility
+    if not resolved["patient_id"]:
+        raise ABDMInternalException(
+            detail="Given ABHA Number is not linked to any patient"
+        )
 
-    if not hasattr(patient_facility, "healthfacility"):
+    hf_id = abha_resolver.resolve_hf_id(resolved["patient_id"])
+    if not hf_id:
         raise ABDMInternalException(
             detail="The facility to which the patient is linked does not have a health facility linked"
         )
 
-    return patient_facility.healthfacility.hf_id
+    return hf_id
+
+
+def normalize_phone_number(phone_number: str | None) -> str | None:
+    """
+    Normalizes a phone number to E.164, assuming India (+91) for national numbers.
+    Returns None if the value cannot be interpreted as a phone number.
+    """
+    if not phone_number:
+        return None
+
+    digits = re.sub(r"\D", "", phone_number)
+    is_international = phone_number.strip().startswith("+")
+
+    if digits.startswith("00"):
+        digits = digits[2:]
+        is_international = True
+
+    if not is_international:
+        if len(digits) == 10:
+            return "+91" + digits
+
+        if len(digits) == 11 and digits.startswith("0"):
+            return "+91" + digits[1:]
+
+        if len(digits) == 12 and digits.startswith("91"):
+            return "+" + digits
+
+        return None
+
+    if 8 <= len(digits) <= 15:
+        return "+" + digits
+
+    return None
+
+
+def patient_gender(gender: str | None) -> int:
+    """
+    Maps an ABDM gender (M, F, O) to care's patient gender, other if unknown.
+    """
+    return {"M": 1, "F": 2, "O": 3}.get(gender, 3)
 
 
 def cm_id():
@@ -0,0 +1,73 @@
+import hashlib
+
+from django.core.cache import cache
+
+from abdm.settings import plugin_settings as settings
+
+IDEMPOTENCY_CACHE_KEY_PREFIX = "abdm_idempotency__"
+IDEMPOTENCY_METRICS_CACHE_KEY_PREFIX = "abdm_idempotency_metrics__"
+
+
+def idempotency_key(endpoint: str, hf_id: str, abha: str, care_contexts) -> str:
+    """
+    Returns a key identifying an outbound call by its endpoint, facility,
+    patient and the set of care context references it carries.
+    """
+    parts = [endpoint, hf_id or "", abha or "", *sorted(set(care_contexts))]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _record(endpoint: str, outcome: str):
+    key = f"{IDEMPOTENCY_METRICS_CACHE_KEY_PREFIX}{endpoint}__{outcome}"
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted between add and incr
+        cache.set(key, 1, timeout=None)
+
+
+def claim(endpoint: str, key: str, reference_id: str, resume: bool = False):
+    """
+    Claims the key for reference_id for ABDM_IDEMPOTENCY_WINDOW seconds.
+    Returns None if the call may go ahead, or the reference id holding the
+    claim if it duplicates a call made within the window.
+
+    With resume, the call continues the one reference_id already made (eg.
+    after a link token arrived) and may go ahead while holding the claim.
+    """
+    if settings.ABDM_IDEMPOTENCY_WINDOW <= 0:
+        return None
+
+    cache_key = f"{IDEMPOTENCY_CACHE_KEY_PREFIX}{key}"
+    if cache.add(cache_key, reference_id, timeout=settings.ABDM_IDEMPOTENCY_WINDOW):
+        _record(endpoint, "miss")
+        return None
+
+    holder = cache.get(cache_key)
+    if holder is None or (resume and holder == reference_id):
+        # expired meanwhile, or the claimed call resuming
+        return None
+
+    _record(endpoint, "hit")
+    return holder
+
+
+def release(key: str):
+    cache.delete(f"{IDEMPOTENCY_CACHE_KEY_PREFIX}{key}")
+
+
+def metrics(endpoint: str) -> dict:
+    values = cache.get_many(
+        [
+            f"{IDEMPOTENCY_METRICS_CACHE_KEY_PREFIX}{endpoint}__hit",
+            f"{IDEMPOTENCY_METRICS_CACHE_KEY_PREFIX}{endpoint}__miss",
+        ]
+    )
+
+    return {
+        outcome: values.get(
+            f"{IDEMPOTENCY_METRICS_CACHE_KEY_PREFIX}{endpoint}__{outcome}", 0
+        )
+        for outcome in ("hit", "miss")
+    }
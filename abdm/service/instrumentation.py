@@ -0,0 +1,201 @@
+import logging
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestEvent:
+    """
+    Timings of a single call made through Request or AsyncRequest.
+
+    timings holds seconds per phase: total and ttfb always, connect (DNS and
+    TCP) and tls when the client reports them, which is only the case for
+    AsyncRequest on a new connection.
+    """
+
+    family: str
+    method: str
+    endpoint: str
+    request_id: str | None
+    started_at: float  # epoch seconds
+    status_code: int | None = None
+    error: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+_hooks = []
+
+
+def register(hook):
+    """
+    Registers a callable invoked with a RequestEvent after every ABDM call.
+    """
+    if hook not in _hooks:
+        _hooks.append(hook)
+
+
+def unregister(hook):
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+def enabled() -> bool:
+    return bool(_hooks)
+
+
+def emit(event: RequestEvent):
+    for hook in _hooks:
+        try:
+            hook(event)
+        except Exception:
+            logger.exception("Error in ABDM instrumentation hook %s", hook)
+
+
+def record(
+    family: str,
+    method: str,
+    endpoint: str,
+    headers: dict | None,
+    started: float,
+    response=None,
+    error: Exception | None = None,
+    timings: dict | None = None,
+):
+    total = time.perf_counter() - started
+    timings = {**(timings or {}), "total": total}
+
+    elapsed = getattr(response, "elapsed", None)
+    if "ttfb" not in timings and elapsed is not None:
+        # requests sets elapsed once the response headers are parsed
+        timings["ttfb"] = elapsed.total_seconds()
+
+    emit(
+        RequestEvent(
+            family=family,
+            method=method.upper(),
+            endpoint=endpoint,
+            request_id=(headers or {}).get("REQUEST-ID"),
+            started_at=time.time() - total,
+            status_code=getattr(response, "status_code", None),
+            error=type(error).__name__ if error else None,
+            timings=timings,
+        )
+    )
+
+
+class HttpxTrace:
+    """
+    httpx trace extension collecting connection phase timings.
+    """
+
+    PHASES = {
+        "connect": "connection.connect_tcp",
+        "tls": "connection.start_tls",
+    }
+
+    def __init__(self, started: float):
+        self.started = started
+        self.events = {}
+
+    async def __call__(self, event_name: str, info: dict):
+        self.events[event_name] = time.perf_counter()
+
+    def timings(self) -> dict[str, float]:
+        timings = {}
+        for phase, name in self.PHASES.items():
+            if f"{name}.complete" in self.events:
+                timings[phase] = (
+                    self.events[f"{name}.complete"] - self.events[f"{name}.started"]
+                )
+
+        for protocol in ("http11", "http2"):
+            received = self.events.get(f"{protocol}.receive_response_headers.complete")
+            if received:
+                timings["ttfb"] = received - self.started
+
+        return timings
+
+
+def prometheus_hook():
+    from prometheus_client import Counter, Histogram
+
+    durations = Histogram(
+        "abdm_request_duration_seconds",
+        "Duration of calls to ABDM by phase",
+        ["family", "endpoint", "phase"],
+    )
+    requests = Counter(
+        "abdm_requests_total",
+        "Calls to ABDM by status code",
+        ["family", "endpoint", "method", "status"],
+    )
+
+    def hook(event: RequestEvent):
+        for phase, seconds in event.timings.items():
+            durations.labels(event.family, event.endpoint, phase).observe(seconds)
+
+        requests.labels(
+            event.family,
+            event.endpoint,
+            event.method,
+            str(event.status_code or event.error),
+        ).inc()
+
+    return hook
+
+
+def opentelemetry_hook():
+    from opentelemetry import trace
+    from opentelemetry.trace import Status, StatusCode
+
+    tracer = trace.get_tracer("abdm")
+
+    def hook(event: RequestEvent):
+        start_time = int(event.started_at * 1e9)
+        span = tracer.start_span(
+            f"ABDM {event.method} {event.endpoint}",
+            kind=trace.SpanKind.CLIENT,
+            start_time=start_time,
+            attributes={
+                "abdm.family": event.family,
+                "abdm.request_id": event.request_id or "",
+                "http.request.method": event.method,
+                "url.path": event.endpoint,
+                **{
+                    f"abdm.timing.{phase}": seconds
+                    for phase, seconds in event.timings.items()
+                },
+            },
+        )
+
+        if event.status_code is not None:
+            span.set_attribute("http.response.status_code", event.status_code)
+
+        if event.error or (event.status_code or 0) >= 500:
+            span.set_status(Status(StatusCode.ERROR, event.error))
+
+        span.end(end_time=start_time + int(event.timings["total"] * 1e9))
+
+    return hook
+
+
+EXPORTERS = {
+    "prometheus": prometheus_hook,
+    "opentelemetry": opentelemetry_hook,
+}
+
+
+def configure(exporters):
+    for name in exporters:
+        if name not in EXPORTERS:
+            logger.warning("Unknown ABDM instrumentation exporter: %s", name)
+            continue
+
+        try:
+            register(EXPORTERS[name]())
+        except ImportError:
+            logger.warning(
+                "ABDM instrumentation exporter %s is not installed, skipping", name
+            )
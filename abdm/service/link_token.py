@@ -0,0 +1,54 @@
+from django.core.cache import cache
+
+LINK_TOKEN_CACHE_KEY_PREFIX = "abdm_link_token__"
+LINK_TOKEN_FRESH_CACHE_KEY_PREFIX = "abdm_link_token_fresh__"
+LINK_TOKEN_PENDING_CACHE_KEY_PREFIX = "abdm_link_token_pending__"
+
+# link tokens are valid for 30 minutes, they are refreshed 5 minutes before
+LINK_TOKEN_TIMEOUT = 60 * 30
+LINK_TOKEN_REFRESH_AFTER = 60 * 25
+
+# a token request without a callback is given up after this
+LINK_TOKEN_REQUEST_TIMEOUT = 60 * 5
+
+
+def _key(prefix: str, hf_id: str, health_id: str) -> str:
+    return f"{prefix}{hf_id}__{health_id}"
+
+
+def get(hf_id: str, health_id: str) -> str | None:
+    return cache.get(_key(LINK_TOKEN_CACHE_KEY_PREFIX, hf_id, health_id))
+
+
+def needs_refresh(hf_id: str, health_id: str) -> bool:
+    return not cache.get(_key(LINK_TOKEN_FRESH_CACHE_KEY_PREFIX, hf_id, health_id))
+
+
+def store(hf_id: str, health_id: str, link_token: str):
+    cache.set(
+        _key(LINK_TOKEN_CACHE_KEY_PREFIX, hf_id, health_id),
+        link_token,
+        timeout=LINK_TOKEN_TIMEOUT,
+    )
+    cache.set(
+        _key(LINK_TOKEN_FRESH_CACHE_KEY_PREFIX, hf_id, health_id),
+        True,
+        timeout=LINK_TOKEN_REFRESH_AFTER,
+    )
+    end_request(hf_id, health_id)
+
+
+def begin_request(hf_id: str, health_id: str) -> bool:
+    """
+    Marks a link token request as in flight for the patient at the facility.
+    Returns False if one already is, in which case no other should be made.
+    """
+    return cache.add(
+        _key(LINK_TOKEN_PENDING_CACHE_KEY_PREFIX, hf_id, health_id),
+        True,
+        timeout=LINK_TOKEN_REQUEST_TIMEOUT,
+    )
+
+
+def end_request(hf_id: str, health_id: str):
+    cache.delete(_key(LINK_TOKEN_PENDING_CACHE_KEY_PREFIX, hf_id, health_id))
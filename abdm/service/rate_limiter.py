@@ -0,0 +1,178 @@
+import logging
+import time
+from email.utils import parsedate_to_datetime
+
+from celery import current_task
+from django.core.cache import cache
+
+from abdm.settings import plugin_settings as settings
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY_PREFIX = "abdm_rate_limit__"
+
+# Reserves a token from the bucket, letting it go negative so callers queue
+# up behind each other, and returns the milliseconds to wait before sending.
+# Returns -1 without reserving if the wait would exceed the given maximum.
+TOKEN_BUCKET_SCRIPT = """
+local now_parts = redis.call("TIME")
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "updated_at", "blocked_until")
+local tokens = tonumber(state[1]) or burst
+local updated_at = tonumber(state[2]) or now
+local blocked_until = tonumber(state[3]) or 0
+
+tokens = math.min(burst, tokens + (now - updated_at) * rate / 1000)
+tokens = tokens - 1
+
+local wait = 0
+if tokens < 0 then
+    wait = math.ceil(-tokens * 1000 / rate)
+end
+wait = math.max(wait, blocked_until - now)
+
+if wait > max_wait then
+    return -1
+end
+
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated_at", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst * 1000 / rate) + wait + 1000)
+return wait
+"""
+
+# Blocks the bucket for the given milliseconds, as asked for by a Retry-After.
+BLOCK_SCRIPT = """
+local now_parts = redis.call("TIME")
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local blocked_until = now + tonumber(ARGV[1])
+
+local current = tonumber(redis.call("HGET", KEYS[1], "blocked_until")) or 0
+if blocked_until > current then
+    redis.call("HSET", KEYS[1], "blocked_until", blocked_until)
+    redis.call("PEXPIRE", KEYS[1], tonumber(ARGV[1]) + 1000)
+end
+return blocked_until
+"""
+
+_scripts = {}
+_warned_unsupported = False
+
+
+def enabled() -> bool:
+    return settings.ABDM_RATE_LIMIT_PER_SECOND > 0
+
+
+def _run(script: str, key: str, *args):
+    global _warned_unsupported
+
+    try:
+        client = cache.client.get_client()
+    except AttributeError:
+        # the token buckets are only shared through redis
+        if not _warned_unsupported:
+            _warned_unsupported = True
+            logger.warning(
+                "ABDM rate limiting is enabled but the cache backend is not "
+                "django-redis, calls will not be rate limited"
+            )
+        return None
+
+    if script not in _scripts:
+        _scripts[script] = client.register_script(script)
+
+    return _scripts[script](keys=[key], args=args, client=client)
+
+
+def bucket(family: str, path: str, headers: dict | None) -> str:
+    hip_id = (headers or {}).get("X-HIP-ID") or "client"
+    return f"{RATE_LIMIT_KEY_PREFIX}{family}__{hip_id}__{path}"
+
+
+def in_task() -> bool:
+    return bool(current_task) and not current_task.request.called_directly
+
+
+def max_wait(sync: bool) -> float:
+    """
+    Returns the seconds a call may be delayed. Synchronous calls outside a
+    celery task hold up a web worker while they wait, so they give up much
+    sooner.
+    """
+    if sync and not in_task():
+        return min(
+            settings.ABDM_RATE_LIMIT_SYNC_MAX_WAIT, settings.ABDM_RATE_LIMIT_MAX_WAIT
+        )
+
+    return settings.ABDM_RATE_LIMIT_MAX_WAIT
+
+
+def unavailable():
+    from abdm.service.helper import ABDMServiceUnavailableException
+
+    return ABDMServiceUnavailableException(
+        detail="Too many requests to ABDM, please try again later"
+    )
+
+
+def reserve(key: str, sync: bool = True) -> float:
+    """
+    Returns the seconds to wait before sending a call through the bucket.
+    Raises ABDMServiceUnavailableException if that exceeds max_wait(sync).
+    """
+    if not enabled():
+        return 0
+
+    wait = _run(
+        TOKEN_BUCKET_SCRIPT,
+        key,
+        settings.ABDM_RATE_LIMIT_PER_SECOND,
+        settings.ABDM_RATE_LIMIT_BURST,
+        int(max_wait(sync) * 1000),
+    )
+
+    if wait is None:
+        return 0
+
+    if wait < 0:
+        raise unavailable()
+
+    return wait / 1000
+
+
+def retry_after(response) -> float | None:
+    """
+    Returns the seconds to back off for if the response is a 429, or None.
+    """
+    if response.status_code != 429:
+        return None
+
+    value = response.headers.get("Retry-After")
+    if not value:
+        return 1
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return 1
+
+
+def block(key: str, seconds: float) -> bool:
+    """
+    Delays every call through the bucket by the given seconds. Returns False
+    if the bucket is not shared, in which case the caller should back off.
+    """
+    logger.warning("Rate limited by ABDM on %s for %s seconds", key, seconds)
+
+    if not enabled():
+        return False
+
+    return _run(BLOCK_SCRIPT, key, int(seconds * 1000)) is not None
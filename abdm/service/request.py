@@ -1,65 +1,114 @@
-import json
 import logging
+import threading
+import time
+from contextvars import ContextVar
+from http.cookiejar import DefaultCookiePolicy
 
 import requests
+from asgiref.sync import async_to_sync
 from django.core.cache import cache
+from requests.adapters import HTTPAdapter
 
+from abdm.service import instrumentation, rate_limiter
+from abdm.service.circuit_breaker import circuit_breaker
 from abdm.settings import plugin_settings as settings
+from abdm.utils.json_codec import JSONDecodeError, dumpb, loads
 
 ABDM_TOKEN_URL = settings.ABDM_GATEWAY_URL + "/gateway/v3/sessions"
 ABDM_TOKEN_CACHE_KEY = "abdm_token"
 
 logger = logging.getLogger(__name__)
 
+# set while a service method runs through abdm.service.async_service.AsyncService
+async_transport = ContextVar("abdm_async_transport", default=False)
+
 
 class Request:
-    def __init__(self, base_url):
+    _session = None
+    _session_lock = threading.Lock()
+
+    def __init__(self, base_url, family="gateway"):
         self.url = base_url
+        self.family = family
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        # shared across instances and threads so connections to the gateway are
+        # reused, cookies are rejected as they would leak between users' calls
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    adapter = HTTPAdapter(
+                        pool_maxsize=settings.ABDM_REQUEST_POOL_SIZE
+                    )
+                    session = requests.Session()
+                    session.cookies.set_policy(
+                        DefaultCookiePolicy(allowed_domains=[])
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    cls._session = session
+
+        return cls._session
 
     def user_header(self, user_token):
         if not user_token:
             return {}
         return {"X-Token": "Bearer " + user_token}
 
-    def auth_header(self):
+    def token_request(self):
+        """
+        Returns the body and headers of a gateway session request.
+        """
         from abdm.service.helper import cm_id, timestamp, uuid
 
-        token = cache.get(ABDM_TOKEN_CACHE_KEY)
-        if not token:
-            data = json.dumps(
-                {
-                    "clientId": settings.ABDM_CLIENT_ID,
-                    "clientSecret": settings.ABDM_CLIENT_SECRET,
-                    "grantType": "client_credentials"
-                }
-            )
-            headers = {
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-                "REQUEST-ID": uuid(),
-                "TIMESTAMP": timestamp(),
-                "X-CM-ID": cm_id(),
+        data = dumpb(
+            {
+                "clientId": settings.ABDM_CLIENT_ID,
+                "clientSecret": settings.ABDM_CLIENT_SECRET,
+                "grantType": "client_credentials"
             }
+        )
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "REQUEST-ID": uuid(),
+            "TIMESTAMP": timestamp(),
+            "X-CM-ID": cm_id(),
+        }
+
+        return data, headers
+
+    def token_from_response(self, response):
+        """
+        Returns (token, expires_in) from a gateway session response, or None.
+        """
+        if response.status_code >= 300:
+            logger.error(f"Error while fetching token: {response.text}")
+            return None
+
+        if response.headers["Content-Type"] != "application/json":
+            logger.error(f"Invalid content type: {response.headers['Content-Type']}")
+            return None
 
-            response = requests.post(
+        data = loads(response.content)
+        return data["accessToken"], data["expiresIn"]
+
+    def auth_header(self):
+        token = cache.get(ABDM_TOKEN_CACHE_KEY)
+        if not token:
+            data, headers = self.token_request()
+            response = self.session().post(
                 ABDM_TOKEN_URL, data=data, headers=headers, timeout=settings.ABDM_REQUEST_TIMEOUT
             )
 
-            if response.status_code < 300:
-                if response.headers["Content-Type"] != "application/json":
-                    logger.error(
-                        f"Invalid content type: {response.headers['Content-Type']}"
-                    )
-                    return None
-                data = response.json()
-                token = data["accessToken"]
-                expires_in = data["expiresIn"]
-
-                cache.set(ABDM_TOKEN_CACHE_KEY, token, expires_in)
-            else:
-                logger.error(f"Error while fetching token: {response.text}")
+            session = self.token_from_response(response)
+            if not session:
                 return None
 
+            token, expires_in = session
+            cache.set(ABDM_TOKEN_CACHE_KEY, token, expires_in)
+
         return {"Authorization": f"Bearer {token}"}
 
     def headers(self, additional_headers=None, auth=None):
@@ -71,40 +120,104 @@ class Request:
             **(self.auth_header() or {}),
         }
 
-    def get(self, path, params=None, headers=None, auth=None):
-        url = self.url + path
-        headers = self.headers(headers, auth)
+    def is_token_rejected(self, response) -> bool:
+        if response.status_code not in (400, 401):
+            return False
 
-        response = requests.get(url, headers=headers, params=params, timeout=settings.ABDM_REQUEST_TIMEOUT)
+        try:
+            result = loads(response.content)
+        except JSONDecodeError:
+            return False
 
-        if response.status_code == 400 or response.status_code == 401:
-            result = response.json()
-            if "code" in result and result["code"] == "900901":
-                cache.delete(ABDM_TOKEN_CACHE_KEY)
-                return self.post(path, params, headers, auth)
+        return isinstance(result, dict) and result.get("code") == "900901"
 
-        return self._handle_response(response)
+    def get(self, path, params=None, headers=None, auth=None):
+        if async_transport.get():
+            return self._run_async("get", path, params, headers, auth)
+
+        return self._send("get", path, headers, auth, params=params)
 
     def post(self, path, data=None, headers=None, auth=None):
-        url = self.url + path
-        payload = json.dumps(data)
-        headers = self.headers(headers, auth)
+        if async_transport.get():
+            return self._run_async("post", path, data, headers, auth)
+
+        return self._send("post", path, headers, auth, data=dumpb(data))
+
+    def _send(self, method, path, headers, auth, retry=True, **kwargs):
+        bucket = rate_limiter.bucket(self.family, path, headers)
+
+        # 429s are retried after the Retry-After they ask for
+        for attempt in range(settings.ABDM_RATE_LIMIT_RETRIES + 1):
+            time.sleep(rate_limiter.reserve(bucket))
+            response = self._dispatch(method, path, headers, auth, **kwargs)
 
-        response = requests.post(url, data=payload, headers=headers, timeout=settings.ABDM_REQUEST_TIMEOUT)
+            backoff = rate_limiter.retry_after(response)
+            # without the limiter, a 429 is handled like any other error
+            if (
+                backoff is None
+                or not rate_limiter.enabled()
+                or attempt == settings.ABDM_RATE_LIMIT_RETRIES
+            ):
+                break
 
-        if response.status_code == 400 or response.status_code == 401:
-            result = response.json()
-            if "code" in result and result["code"] == "900901":
-                cache.delete(ABDM_TOKEN_CACHE_KEY)
-                return self.post(path, data, headers, auth)
+            if not rate_limiter.block(bucket, backoff):
+                if backoff > rate_limiter.max_wait(sync=True):
+                    raise rate_limiter.unavailable()
+
+                time.sleep(backoff)
+
+        # the cached token was rejected, retry once with a new one
+        if retry and self.is_token_rejected(response):
+            cache.delete(ABDM_TOKEN_CACHE_KEY)
+            return self._send(method, path, headers, auth, retry=False, **kwargs)
 
         return self._handle_response(response)
 
-    def _handle_response(self, response: requests.Response):
+    def _dispatch(self, method, path, headers, auth, **kwargs):
+        breaker = circuit_breaker(self.family)
+        breaker.acquire()
+
+        instrumented = instrumentation.enabled()
+        started = None
+        try:
+            request_headers = self.headers(headers, auth)
+            started = time.perf_counter()
+            response = self.session().request(
+                method,
+                self.url + path,
+                headers=request_headers,
+                timeout=settings.ABDM_REQUEST_TIMEOUT,
+                **kwargs,
+            )
+        except Exception as e:
+            breaker.release(success=False)
+            if instrumented and started is not None:
+                instrumentation.record(
+                    self.family, method, path, headers, started, error=e
+                )
+            raise
+
+        breaker.release(success=response.status_code < 500)
+        if instrumented:
+            instrumentation.record(
+                self.family, method, path, headers, started, response=response
+            )
+        return response
+
+    def _run_async(self, method, *args):
+        # called by a service method wrapped in AsyncService, from a worker
+        # thread; the request itself runs on the caller's event loop
+        from abdm.service.async_request import AsyncRequest
+
+        return async_to_sync(getattr(AsyncRequest(self.url, self.family), method))(
+            *args
+        )
+
+    def _handle_response(self, response):
         def custom_json():
             try:
-                return json.loads(response.text)
-            except json.JSONDecodeError as json_err:
+                return loads(response.content)
+            except JSONDecodeError as json_err:
                 logger.error(f"JSON Decode error: {json_err}")
                 return {"error": response.text}
             except Exception as err:
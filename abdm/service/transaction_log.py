@@ -0,0 +1,133 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core import serializers
+
+from abdm.models.transaction import Transaction
+from abdm.settings import plugin_settings as settings
+
+logger = logging.getLogger(__name__)
+
+_current_scope = ContextVar("abdm_transaction_log_scope", default=None)
+
+
+class TransactionLog:
+    """
+    Buffers audit Transaction rows and writes them with a single bulk_create.
+
+    Buffering only happens inside a scope, opened around the plugin's views by
+    TransactionLogMixin and around celery tasks with begin() and end() (see
+    abdm.signals.transaction_log). Scopes are flushed before the response is
+    returned, and are kept in a context variable so that requests served on
+    the same thread (eg. under ASGI) never share one. Outside a scope, or when
+    ABDM_TRANSACTION_LOG_BUFFER_SIZE is 0, log() saves synchronously.
+
+    Entries are validated when logged, so a flush can only fail on database
+    errors. If the bulk insert fails, every entry is retried with save(). The
+    ones that still fail are logged as a fixture that loaddata can replay, and
+    the error is raised so that the request or task fails, as it would have
+    had they been saved synchronously.
+    """
+
+    @property
+    def _scope(self):
+        return _current_scope.get()
+
+    @staticmethod
+    def _new_scope() -> dict:
+        return {"entries": [], "started_at": time.monotonic()}
+
+    def begin(self):
+        if self._scope is not None:
+            self.flush()
+
+        _current_scope.set(self._new_scope())
+
+    def end(self):
+        try:
+            self.flush()
+        finally:
+            _current_scope.set(None)
+
+    @contextmanager
+    def scope(self):
+        token = _current_scope.set(self._new_scope())
+        try:
+            yield
+        finally:
+            try:
+                self.flush()
+            finally:
+                _current_scope.reset(token)
+
+    def log(self, **kwargs) -> Transaction:
+        instance = Transaction(**kwargs)
+        instance._validate_meta_data()
+
+        scope = self._scope
+        buffer_size = settings.ABDM_TRANSACTION_LOG_BUFFER_SIZE
+        if scope is None or buffer_size <= 0:
+            instance.save()
+            return instance
+
+        scope["entries"].append(instance)
+
+        if (
+            len(scope["entries"]) >= buffer_size
+            or time.monotonic() - scope["started_at"]
+            >= settings.ABDM_TRANSACTION_LOG_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+        return instance
+
+    def flush(self):
+        scope = self._scope
+        if scope is None:
+            return
+
+        entries = scope["entries"]
+        scope["entries"] = []
+        scope["started_at"] = time.monotonic()
+
+        if not entries:
+            return
+
+        try:
+            Transaction.objects.bulk_create(entries)
+        except Exception as e:
+            logger.warning(
+                f"Bulk insert of {len(entries)} transactions failed, retrying individually: {e!s}"
+            )
+
+            failed = []
+            error = None
+            for entry in entries:
+                try:
+                    entry.save()
+                except Exception as entry_error:
+                    failed.append(entry)
+                    error = error or entry_error
+
+            if failed:
+                logger.error(
+                    f"Failed to write {len(failed)} transactions, replay them "
+                    f"with loaddata: {serializers.serialize('json', failed)}"
+                )
+                raise error
+
+
+transaction_log = TransactionLog()
+
+
+class TransactionLogMixin:
+    """
+    Buffers the audit transactions logged by a view and writes them before
+    its response is returned.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with transaction_log.scope():
+            return super().dispatch(request, *args, **kwargs)
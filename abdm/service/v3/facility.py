@@ -1,6 +1,7 @@
 import re
 from typing import Any, Dict
 
+from abdm.service.async_service import AsyncService
 from abdm.service.helper import ABDMAPIException
 from abdm.service.request import Request
 from abdm.service.v3.types.facility import (
@@ -11,7 +12,7 @@ from abdm.settings import plugin_settings as settings
 
 
 class FacilityService:
-    request = Request(f"{settings.ABDM_FACILITY_URL}/v1")
+    request = Request(f"{settings.ABDM_FACILITY_URL}/v1", family="facility")
 
     @staticmethod
     def handle_error(error: Dict[str, Any] | str) -> str:
@@ -73,3 +74,6 @@ class FacilityService:
             raise ABDMAPIException(detail=FacilityService.handle_error(response.json()))
 
         return response
+
+
+AsyncFacilityService = AsyncService(FacilityService)
@@ -1,14 +1,20 @@
+import logging
 from collections import defaultdict
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
 import requests
 from django.core.cache import cache
+from django.db import transaction as db_transaction
 
 from abdm.models import HealthInformationType, Purpose, Transaction, TransactionType
 from abdm.models.transaction import TransactionStatus
+from abdm.service import data_flow_trace, idempotency
+from abdm.service import link_token as link_token_store
+from abdm.service.async_service import AsyncService
 from abdm.service.helper import (
     ABDMAPIException,
+    care_context_dict_from_reference_id,
     cm_id,
     generate_care_contexts_for_existing_data,
     hf_id_from_abha_id,
@@ -16,6 +22,7 @@ from abdm.service.helper import (
     uuid,
 )
 from abdm.service.request import Request
+from abdm.service.transaction_log import transaction_log
 from abdm.service.v3.types.gateway import (
     ConsentFetchBody,
     ConsentFetchResponse,
@@ -38,6 +45,7 @@ from abdm.service.v3.types.gateway import (
     IdentityAuthenticationBody,
     IdentityAuthenticationResponse,
     LinkCarecontextBody,
+    LinkCarecontextFlushBody,
     LinkCarecontextResponse,
     PatientShareOnShareBody,
     PatientShareOnShareResponse,
@@ -53,6 +61,7 @@ from abdm.service.v3.types.gateway import (
 from abdm.settings import plugin_settings as settings
 from abdm.utils.cipher import Cipher
 from abdm.utils.fhir_v1 import Fhir
+from abdm.utils.json_codec import dumpb
 from care.facility.models import (
     DailyRound,
     InvestigationSession,
@@ -61,6 +70,59 @@ from care.facility.models import (
     SuggestionChoices,
 )
 
+logger = logging.getLogger(__name__)
+
+
+LINK_CARE_CONTEXT_BATCH_SIZE = 50
+
+
+def batch_link_transactions(
+    transactions: list[Transaction], care_contexts: list[dict], user
+) -> list[tuple[str, list[dict]]]:
+    """
+    Moves the care contexts of the given hip initiated links into one
+    INITIATED link per batch, and returns the reference id and care contexts
+    of each. Every batch has its own row before any is sent, so a batch that
+    fails to send is left for the retry task rather than lost.
+    """
+    batches = [
+        care_contexts[i : i + LINK_CARE_CONTEXT_BATCH_SIZE]
+        for i in range(0, len(care_contexts), LINK_CARE_CONTEXT_BATCH_SIZE)
+    ]
+    if not batches:
+        # none of the care contexts exist anymore
+        Transaction.objects.filter(
+            id__in=[transaction.id for transaction in transactions]
+        ).update(status=TransactionStatus.CANCELLED)
+        return []
+
+    meta_data = transactions[0].meta_data
+    reference_ids = [transactions[0].reference_id] + [uuid() for _ in batches[1:]]
+
+    with db_transaction.atomic():
+        # the first link is kept for the first batch, the others are replaced
+        Transaction.objects.filter(
+            id__in=[transaction.id for transaction in transactions[1:]]
+        ).update(status=TransactionStatus.CANCELLED)
+
+        for reference_id, batch in zip(reference_ids, batches):
+            Transaction.objects.update_or_create(
+                reference_id=reference_id,
+                defaults={
+                    "type": TransactionType.LINK_CARE_CONTEXT,
+                    "status": TransactionStatus.INITIATED,
+                    "meta_data": {
+                        **meta_data,
+                        "care_contexts": [
+                            care_context["reference"] for care_context in batch
+                        ],
+                    },
+                    "created_by": user,
+                },
+            )
+
+    return list(zip(reference_ids, batches))
+
 
 class GatewayService:
     request = Request(settings.ABDM_GATEWAY_URL)
@@ -166,7 +228,44 @@ class GatewayService:
                 detail="Provide a health facility id to link care context"
             )
 
-        reference_id = data.get("reference_id", uuid())
+        references = sorted(
+            {care_context["reference"] for care_context in care_contexts}
+        )
+        idempotency_key = idempotency.idempotency_key(
+            "link__carecontext", hf_id, abha_number.health_id, references
+        )
+
+        # a pending link of the same care contexts is resumed instead of repeated
+        reference_id = (
+            data.get("reference_id")
+            or Transaction.objects.filter(
+                type=TransactionType.LINK_CARE_CONTEXT,
+                status=TransactionStatus.INITIATED,
+                meta_data__hf_id=hf_id,
+                meta_data__abha_number=str(abha_number.external_id),
+                meta_data__care_contexts=references,
+            )
+            .values_list("reference_id", flat=True)
+            .first()
+            or uuid()
+        )
+
+        # a reference found above may be claimed by a concurrent duplicate
+        # that found the same row, only an explicit one resumes its claim
+        holder = idempotency.claim(
+            "link__carecontext",
+            idempotency_key,
+            reference_id,
+            resume=bool(data.get("reference_id")),
+        )
+        if holder:
+            logger.info(
+                "Skipping link of care contexts %s, already requested by %s",
+                references,
+                holder,
+            )
+            return {}
+
         Transaction.objects.update_or_create(
             reference_id=reference_id,
             defaults={
@@ -175,25 +274,40 @@ class GatewayService:
                 "meta_data": {
                     "abha_number": str(abha_number.external_id),
                     "type": "hip_initiated_linking",
-                    "care_contexts": list(map(lambda x: x["reference"], care_contexts)),
+                    "care_contexts": references,
                     "hf_id": hf_id,
                 },
                 "created_by": data.get("user"),
             },
         )
 
-        link_token = cache.get(f"abdm_link_token__{hf_id}__{abha_number.health_id}")
+        health_id = abha_number.health_id
+        link_token = link_token_store.get(hf_id, health_id)
+
+        # only one token request is in flight per patient and facility, links
+        # made meanwhile stay INITIATED and are flushed together once it arrives
+        if (
+            not link_token or link_token_store.needs_refresh(hf_id, health_id)
+        ) and link_token_store.begin_request(hf_id, health_id):
+            try:
+                GatewayService.token__generate_token(
+                    {
+                        "abha_number": abha_number,
+                        "purpose": "LINK_CARECONTEXT",
+                        "care_contexts": care_contexts,
+                        "hf_id": hf_id,
+                        "reference_id": reference_id,
+                    }
+                )
+            except Exception:
+                link_token_store.end_request(hf_id, health_id)
+                if not link_token:
+                    idempotency.release(idempotency_key)
+                    raise
+
+                logger.exception("Error while refreshing link token of %s", health_id)
 
         if not link_token:
-            GatewayService.token__generate_token(
-                {
-                    "abha_number": abha_number,
-                    "purpose": "LINK_CARECONTEXT",
-                    "care_contexts": care_contexts,
-                    "hf_id": hf_id,
-                    "reference_id": reference_id,
-                }
-            )
             return {}
 
         grouped_care_contexts = defaultdict(list)
@@ -226,19 +340,24 @@ class GatewayService:
         }
 
         path = "/hip/v3/link/carecontext"
-        response = GatewayService.request.post(
-            path,
-            payload,
-            headers={
-                "REQUEST-ID": reference_id,
-                "TIMESTAMP": timestamp(),
-                "X-CM-ID": cm_id(),
-                "X-HIP-ID": hf_id,
-                "X-LINK-TOKEN": link_token,
-            },
-        )
+        try:
+            response = GatewayService.request.post(
+                path,
+                payload,
+                headers={
+                    "REQUEST-ID": reference_id,
+                    "TIMESTAMP": timestamp(),
+                    "X-CM-ID": cm_id(),
+                    "X-HIP-ID": hf_id,
+                    "X-LINK-TOKEN": link_token,
+                },
+            )
+        except Exception:
+            idempotency.release(idempotency_key)
+            raise
 
         if response.status_code != 202:
+            idempotency.release(idempotency_key)
             raise ABDMAPIException(detail=GatewayService.handle_error(response.json()))
 
         Transaction.objects.filter(reference_id=reference_id).update(
@@ -247,6 +366,58 @@ class GatewayService:
 
         return {}
 
+    @staticmethod
+    def link__carecontext__flush(
+        data: LinkCarecontextFlushBody,
+    ) -> LinkCarecontextResponse:
+        """
+        Links the care contexts of every pending hip initiated link of the
+        patient at the facility, merged into as few calls as possible.
+        """
+        patient = data.get("patient")
+        hf_id = data.get("hf_id")
+        abha_number = getattr(patient, "abha_number", None)
+        if not abha_number or not hf_id:
+            return {}
+
+        transactions = list(
+            Transaction.objects.filter(
+                type=TransactionType.LINK_CARE_CONTEXT,
+                status=TransactionStatus.INITIATED,
+                meta_data__type="hip_initiated_linking",
+                meta_data__hf_id=hf_id,
+                meta_data__abha_number=str(abha_number.external_id),
+            ).order_by("created_date")
+        )
+        if not transactions:
+            return {}
+
+        references = sorted(
+            {
+                reference
+                for transaction in transactions
+                for reference in transaction.meta_data.get("care_contexts", [])
+            }
+        )
+        care_contexts = list(
+            filter(None, map(care_context_dict_from_reference_id, references))
+        )
+
+        for reference_id, batch in batch_link_transactions(
+            transactions, care_contexts, data.get("user")
+        ):
+            GatewayService.link__carecontext(
+                {
+                    "reference_id": reference_id,
+                    "patient": patient,
+                    "care_contexts": batch,
+                    "user": data.get("user"),
+                    "hf_id": hf_id,
+                }
+            )
+
+        return {}
+
     @staticmethod
     def user_initiated_linking__patient__care_context__on_discover(
         data: UserInitiatedLinkingPatientCareContextOnDiscoverBody,
@@ -419,7 +590,7 @@ class GatewayService:
         if response.status_code != 202:
             raise ABDMAPIException(detail=GatewayService.handle_error(response.json()))
 
-        Transaction.objects.create(
+        transaction_log.log(
             reference_id=request_id,
             type=TransactionType.LINK_CARE_CONTEXT,
             meta_data={
@@ -498,13 +669,15 @@ class GatewayService:
                 detail="Provide a consent to transfer health information"
             )
 
-        cipher = Cipher(
-            external_public_key=data.get("key_material__public_key"),
-            external_nonce=data.get("key_material__nonce"),
-        )
+        with data_flow_trace.stage("encrypt"):
+            cipher = Cipher(
+                external_public_key=data.get("key_material__public_key"),
+                external_nonce=data.get("key_material__nonce"),
+            )
 
         entries = []
         for care_context in consent.care_contexts:
+            data_flow_trace.count("care_contexts")
             care_context_reference = care_context.get("careContextReference", "")
             patient_reference = care_context.get("patientReference", "")
 
@@ -514,9 +687,10 @@ class GatewayService:
             [version, model, param] = care_context_reference.split("::")
 
             if model == "consultation":
-                consultation = PatientConsultation.objects.filter(
-                    external_id=param
-                ).first()
+                with data_flow_trace.stage("fetch"):
+                    consultation = PatientConsultation.objects.filter(
+                        external_id=param
+                    ).first()
 
                 if not consultation:
                     continue
@@ -535,7 +709,10 @@ class GatewayService:
                 model == "investigation_session"
                 and HealthInformationType.DIAGNOSTIC_REPORT in consent.hi_types
             ):
-                session = InvestigationSession.objects.filter(external_id=param).first()
+                with data_flow_trace.stage("fetch"):
+                    session = InvestigationSession.objects.filter(
+                        external_id=param
+                    ).first()
 
                 if not session:
                     continue
@@ -546,21 +723,25 @@ class GatewayService:
                 model == "prescription"
                 and HealthInformationType.PRESCRIPTION in consent.hi_types
             ):
-                prescriptions = Prescription.objects.filter(
-                    created_date__date=param,
-                    consultation__patient__external_id=patient_reference,
-                )
+                with data_flow_trace.stage("fetch"):
+                    prescriptions = list(
+                        Prescription.objects.filter(
+                            created_date__date=param,
+                            consultation__patient__external_id=patient_reference,
+                        )
+                    )
 
-                if not prescriptions.exists():
+                if not prescriptions:
                     continue
 
-                fhir_data = Fhir().create_prescription_record(list(prescriptions))
+                fhir_data = Fhir().create_prescription_record(prescriptions)
 
             elif (
                 model == "daily_round"
                 and HealthInformationType.WELLNESS_RECORD in consent.hi_types
             ):
-                daily_round = DailyRound.objects.filter(external_id=param).first()
+                with data_flow_trace.stage("fetch"):
+                    daily_round = DailyRound.objects.filter(external_id=param).first()
 
                 if not daily_round:
                     continue
@@ -570,7 +751,12 @@ class GatewayService:
             else:
                 continue
 
-            encrypted_data = cipher.encrypt(fhir_data.json())["data"]
+            with data_flow_trace.stage("fhir_build"):
+                content = fhir_data.json()
+
+            with data_flow_trace.stage("encrypt"):
+                encrypted_data = cipher.encrypt(content)["data"]
+
             entry = {
                 "content": encrypted_data,
                 "media": "application/fhir+json",
@@ -579,6 +765,7 @@ class GatewayService:
             }
             entries.append(entry)
 
+        data_flow_trace.count("entries", len(entries))
         payload = {
             "pageNumber": 1,
             "pageCount": 1,
@@ -598,32 +785,24 @@ class GatewayService:
             },
         }
 
-        auth_header = Request("").auth_header()
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            **auth_header,
-        }
+        with data_flow_trace.stage("push"):
+            auth_header = Request("").auth_header()
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                **auth_header,
+            }
 
-        path = data.get("url", "")
-        response = requests.post(
-            path,
-            json=payload,
-            headers=headers,
-        )
+            path = data.get("url", "")
+            response = requests.post(
+                path,
+                data=dumpb(payload),
+                headers=headers,
+            )
 
         if response.status_code != 202:
             raise ABDMAPIException(detail=GatewayService.handle_error(response.json()))
 
-        Transaction.objects.create(
-            reference_id=data.get("transaction_id"),
-            type=TransactionType.EXCHANGE_DATA,
-            meta_data={
-                "consent_artefact": str(consent.external_id),
-                "is_incoming": False,
-            },
-        )
-
         return {}
 
     @staticmethod
@@ -974,3 +1153,6 @@ class GatewayService:
             raise ABDMAPIException(detail=GatewayService.handle_error(response.json()))
 
         return {}
+
+
+AsyncGatewayService = AsyncService(GatewayService)
@@ -1,5 +1,6 @@
 from typing import Any
 
+from abdm.service.async_service import AsyncService
 from abdm.service.helper import (
     ABDMAPIException,
     benefit_name,
@@ -42,7 +43,7 @@ from abdm.settings import plugin_settings as settings
 
 
 class HealthIdService:
-    request = Request(f"{settings.ABDM_ABHA_URL}/v3")
+    request = Request(f"{settings.ABDM_ABHA_URL}/v3", family="abha")
 
     @staticmethod
     def handle_error(error: dict[str, Any] | str) -> str:
@@ -448,3 +449,6 @@ class HealthIdService:
             raise ABDMAPIException(detail=HealthIdService.handle_error(response.json()))
 
         return response.content
+
+
+AsyncHealthIdService = AsyncService(HealthIdService)
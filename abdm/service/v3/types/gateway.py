@@ -40,6 +40,12 @@ class LinkCarecontextResponse(TypedDict):
     pass
 
 
+class LinkCarecontextFlushBody(TypedDict):
+    patient: PatientRegistration
+    hf_id: str
+    user: User
+
+
 class UserInitiatedLinkingPatientCareContextOnDiscoverBody(TypedDict):
     transaction_id: str
     request_id: str
@@ -120,6 +120,29 @@ DEFAULTS = {
     "ABDM_CM_ID": "sbx",
     "ABDM_BENEFIT_NAME": "",
     "ABDM_REQUEST_TIMEOUT": 30,
+    "ABDM_REQUEST_POOL_SIZE": 10,
+    "ABDM_CIRCUIT_BREAKER_FAILURE_THRESHOLD": 5,
+    "ABDM_CIRCUIT_BREAKER_RECOVERY_TIMEOUT": 30,
+    "ABDM_CONCURRENCY_LIMIT": 50,
+    "ABDM_IDEMPOTENCY_WINDOW": 300,
+    "ABDM_RATE_LIMIT_PER_SECOND": 0,
+    "ABDM_RATE_LIMIT_BURST": 20,
+    "ABDM_RATE_LIMIT_MAX_WAIT": 30,
+    "ABDM_RATE_LIMIT_SYNC_MAX_WAIT": 1,
+    "ABDM_RATE_LIMIT_RETRIES": 3,
+    "ABDM_INSTRUMENTATION": [],
+    "ABDM_TRANSACTION_LOG_BUFFER_SIZE": 100,
+    "ABDM_TRANSACTION_LOG_FLUSH_INTERVAL": 5,
+    "ABDM_HEALTH_INFORMATION_CACHE_DIR": "",
+    "ABDM_HEALTH_INFORMATION_CACHE_SIZE": 0,
+    "ABDM_HEALTH_INFORMATION_CACHE_MAX_AGE": 86400,
+    "ABDM_KEY_MATERIAL_POOL_SIZE": 100,
+    "ABDM_KEY_MATERIAL_POOL_LOW_WATER_MARK": 20,
+    "ABDM_CONSENT_RECONCILIATION_STALE_AFTER": 3600,
+    "ABDM_CONSENT_RECONCILIATION_BATCH_SIZE": 100,
+    "ABDM_CONSENT_RECONCILIATION_CONCURRENCY": 8,
+    "ABDM_CONSENT_EXPIRY_SWEEP_BATCH_SIZE": 500,
+    "ABDM_DELETE_EXPIRED_HEALTH_INFORMATION": False,
     "AUTH_USER_MODEL": "users.User",
     "CURRENT_DOMAIN": "https://care.ohc.network",
     "BACKEND_DOMAIN": "https://careapi.ohc.network",
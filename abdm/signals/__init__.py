@@ -1 +1,4 @@
+from .abha_number import *  # noqa
+from .patient_discovery import *  # noqa
 from .register_care_contexts import *  # noqa
+from .transaction_log import *  # noqa
@@ -0,0 +1,69 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from abdm.models import AbhaNumber
+from abdm.service import abha_resolver
+from care.facility.models import PatientConsultation, PatientRegistration
+
+LOADED_IDENTIFIER_FIELDS = ("abha_number", "health_id", "patient_id")
+
+
+def remember_abha_identifiers(instance: AbhaNumber):
+    # read from __dict__ so that deferred fields are not loaded
+    instance._loaded_identifiers = {
+        field: instance.__dict__.get(field) for field in LOADED_IDENTIFIER_FIELDS
+    }
+
+
+@receiver(post_init, sender=AbhaNumber)
+def remember_abha_identifiers_on_init(sender, instance: AbhaNumber, **kwargs):
+    # identifiers changed by a later save still resolve until invalidated
+    remember_abha_identifiers(instance)
+
+
+@receiver(post_save, sender=AbhaNumber)
+def invalidate_abha_identifier_cache_on_save(
+    sender, instance: AbhaNumber, created: bool, **kwargs
+):
+    loaded = getattr(instance, "_loaded_identifiers", {})
+
+    patient_ids = ()
+    if not created and loaded.get("patient_id") != instance.patient_id:
+        patient_ids = [
+            patient_id
+            for patient_id in (loaded.get("patient_id"), instance.patient_id)
+            if patient_id
+        ]
+
+    abha_resolver.invalidate(
+        instance,
+        loaded.get("abha_number"),
+        loaded.get("health_id"),
+        patient_ids=patient_ids,
+    )
+    remember_abha_identifiers(instance)
+
+
+@receiver(post_delete, sender=AbhaNumber)
+def invalidate_abha_identifier_cache_on_delete(sender, instance: AbhaNumber, **kwargs):
+    abha_resolver.invalidate(
+        instance, patient_ids=[instance.patient_id] if instance.patient_id else ()
+    )
+
+
+# the resolved hf_id follows the patient's last consultation and its facility
+@receiver(post_save, sender=PatientConsultation)
+def invalidate_hf_id_cache_on_consultation_save(
+    sender, instance: PatientConsultation, created: bool, **kwargs
+):
+    if instance.patient_id:
+        abha_resolver.invalidate_hf_id(instance.patient_id)
+
+
+@receiver(post_save, sender=PatientRegistration)
+def invalidate_hf_id_cache_on_patient_save(
+    sender, instance: PatientRegistration, created: bool, **kwargs
+):
+    update_fields = kwargs.get("update_fields")
+    if not created and (update_fields is None or "last_consultation" in update_fields):
+        abha_resolver.invalidate_hf_id(instance.id)
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from abdm.models import PatientDiscoveryIndex
+from care.facility.models import PatientRegistration
+
+
+@receiver(post_save, sender=PatientRegistration)
+def sync_patient_discovery_index(
+    sender, instance: PatientRegistration, created: bool, **kwargs
+):
+    PatientDiscoveryIndex.sync(instance)
@@ -0,0 +1,13 @@
+from celery.signals import task_postrun, task_prerun
+
+from abdm.service.transaction_log import transaction_log
+
+
+@task_prerun.connect
+def begin_transaction_log_on_task_prerun(sender=None, **kwargs):
+    transaction_log.begin()
+
+
+@task_postrun.connect
+def flush_transaction_log_on_task_postrun(sender=None, **kwargs):
+    transaction_log.end()
@@ -0,0 +1,358 @@
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from abdm.simulator.gateway import GatewaySimulator, timestamp, uuid
+from abdm.utils.cipher import Cipher
+from abdm.utils.fidelius import KeyMaterial
+
+logger = logging.getLogger(__name__)
+
+STEPS = (
+    "discover",
+    "link_init",
+    "link_confirm",
+    "consent_notify",
+    "health_information",
+)
+
+
+class CycleError(Exception):
+    pass
+
+
+@dataclass
+class SimulatedPatient:
+    abha_number: str
+    health_id: str
+    name: str
+    gender: str
+    year_of_birth: int
+    hf_id: str
+
+
+@dataclass
+class LoadReport:
+    timings: dict = field(default_factory=lambda: {step: [] for step in STEPS})
+    errors: dict = field(default_factory=lambda: {step: 0 for step in STEPS})
+    cycles: int = 0
+    failed_cycles: int = 0
+    elapsed: float = 0
+    bytes_received: int = 0
+
+    @staticmethod
+    def percentile(values: list[float], percent: float) -> float:
+        if not values:
+            return 0
+        if len(values) == 1:
+            return values[0]
+
+        return statistics.quantiles(values, n=100, method="inclusive")[int(percent) - 1]
+
+    def summary(self) -> str:
+        lines = [
+            f"{'step':<20} {'ok':>6} {'errors':>7} {'p50 (ms)':>10} "
+            f"{'p90 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10}"
+        ]
+        for step in STEPS:
+            values = self.timings[step]
+            lines.append(
+                f"{step:<20} {len(values):>6} {self.errors[step]:>7} "
+                + " ".join(
+                    f"{self.percentile(values, percent) * 1000:>10.1f}"
+                    for percent in (50, 90, 99)
+                )
+                + f" {max(values, default=0) * 1000:>10.1f}"
+            )
+
+        completed = self.cycles - self.failed_cycles
+        lines.append(
+            f"{completed}/{self.cycles} cycles in {self.elapsed:.1f}s, "
+            f"{completed / self.elapsed if self.elapsed else 0:.2f} cycles/s, "
+            f"{self.bytes_received / 1024:.1f} KiB of health information received"
+        )
+        return "\n".join(lines)
+
+
+class LoadDriver:
+    """
+    Replays discover, link, consent and health information request cycles
+    against the plugin's HIP callbacks, as the consent manager and an HIU
+    would, and times each step from the callback sent to the plugin until the
+    plugin's answer reaches the simulator.
+    """
+
+    def __init__(
+        self,
+        simulator: GatewaySimulator,
+        patients: list[SimulatedPatient],
+        hi_types: list[str],
+        timeout: float = 30,
+        verify_data: bool = False,
+    ):
+        self.simulator = simulator
+        self.patients = patients
+        self.hi_types = hi_types
+        self.timeout = timeout
+        self.verify_data = verify_data
+        # every id sent to the plugin, which keys the rows it creates for them
+        self.ids = set()
+
+    def uuid(self) -> str:
+        id = uuid()
+        self.ids.add(id)
+        return id
+
+    def run(self, cycles: int, concurrency: int) -> LoadReport:
+        report = LoadReport(cycles=cycles)
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = executor.map(
+                lambda index: self.cycle(self.patients[index % len(self.patients)]),
+                range(cycles),
+            )
+
+            for timings, failed_step, received in results:
+                for step, seconds in timings.items():
+                    report.timings[step].append(seconds)
+
+                if failed_step:
+                    report.errors[failed_step] += 1
+                    report.failed_cycles += 1
+
+                report.bytes_received += received
+
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def _step(self, path, expected_path, id, payload, headers):
+        """
+        Sends a callback and waits for the plugin's answer to expected_path.
+        Returns the seconds it took and the answer.
+        """
+        future = self.simulator.expect(expected_path, id)
+        started = time.perf_counter()
+
+        try:
+            response = self.simulator.callback(path, payload, headers)
+            if response.status_code >= 400:
+                raise CycleError(
+                    f"{path} answered {response.status_code}: {response.text[:200]}"
+                )
+
+            answer = future.result(timeout=self.timeout)
+        except FutureTimeoutError as e:
+            raise CycleError(f"No answer to {path} on {expected_path}") from e
+        finally:
+            self.simulator.forget(expected_path, id)
+
+        return time.perf_counter() - started, answer
+
+    def cycle(self, patient: SimulatedPatient):
+        timings = {}
+        step = STEPS[0]
+        received = 0
+        hip_headers = {"X-HIP-ID": patient.hf_id}
+
+        try:
+            transaction_id = self.uuid()
+            request_id = self.uuid()
+            timings[step], discovered = self._step(
+                "/api/v3/hip/patient/care-context/discover",
+                "/user-initiated-linking/v3/patient/care-context/on-discover",
+                request_id,
+                {
+                    "transactionId": transaction_id,
+                    "patient": {
+                        "id": patient.health_id,
+                        "name": patient.name,
+                        "gender": patient.gender,
+                        "yearOfBirth": patient.year_of_birth,
+                        "verifiedIdentifiers": [
+                            {"type": "ABHA_NUMBER", "value": patient.abha_number}
+                        ],
+                        "unverifiedIdentifiers": [],
+                    },
+                },
+                {**hip_headers, "REQUEST-ID": request_id},
+            )
+
+            if discovered.get("error") or not discovered.get("patient"):
+                raise CycleError(f"Patient not discovered: {discovered.get('error')}")
+
+            step = "link_init"
+            request_id = self.uuid()
+            timings[step], initiated = self._step(
+                "/api/v3/hip/link/care-context/init",
+                "/user-initiated-linking/v3/link/care-context/on-init",
+                request_id,
+                {
+                    "transactionId": transaction_id,
+                    "abhaAddress": patient.health_id,
+                    "patient": [
+                        {
+                            "referenceNumber": group["referenceNumber"],
+                            "careContexts": [
+                                {"referenceNumber": care_context["referenceNumber"]}
+                                for care_context in group["careContexts"]
+                            ],
+                            "hiType": group["hiType"],
+                            "count": group["count"],
+                        }
+                        for group in discovered["patient"]
+                    ],
+                },
+                {**hip_headers, "REQUEST-ID": request_id},
+            )
+
+            step = "link_confirm"
+            request_id = self.uuid()
+            timings[step], _ = self._step(
+                "/api/v3/hip/link/care-context/confirm",
+                "/user-initiated-linking/v3/link/care-context/on-confirm",
+                request_id,
+                {
+                    "confirmation": {
+                        "linkRefNumber": initiated["link"]["referenceNumber"],
+                        "token": "000000",
+                    }
+                },
+                {**hip_headers, "REQUEST-ID": request_id},
+            )
+
+            step = "consent_notify"
+            request_id = self.uuid()
+            consent_id = self.uuid()
+            date_range = {
+                "from": timestamp(-timedelta(days=365 * 5)),
+                "to": timestamp(),
+            }
+            timings[step], _ = self._step(
+                "/api/v3/consent/request/hip/notify",
+                "/consent/v3/request/hip/on-notify",
+                request_id,
+                {
+                    "notification": {
+                        "status": "GRANTED",
+                        "consentId": consent_id,
+                        "signature": "simulated",
+                        "consentDetail": {
+                            "schemaVersion": "v3",
+                            "consentId": consent_id,
+                            "createdAt": timestamp(),
+                            "patient": {"id": patient.health_id},
+                            "careContexts": [
+                                {
+                                    "patientReference": group["referenceNumber"],
+                                    "careContextReference": care_context[
+                                        "referenceNumber"
+                                    ],
+                                }
+                                for group in discovered["patient"]
+                                for care_context in group["careContexts"]
+                            ],
+                            "purpose": {
+                                "text": "Care Management",
+                                "code": "CAREMGT",
+                                "refUri": None,
+                            },
+                            "hip": {"id": patient.hf_id},
+                            "consentManager": {"id": self.simulator.config.cm_id},
+                            "hiTypes": self.hi_types,
+                            "permission": {
+                                "accessMode": "VIEW",
+                                "dateRange": date_range,
+                                "dataEraseAt": timestamp(timedelta(days=1)),
+                                "frequency": {
+                                    "unit": "HOUR",
+                                    "value": 1,
+                                    "repeats": 0,
+                                },
+                            },
+                        },
+                    }
+                },
+                {**hip_headers, "REQUEST-ID": request_id},
+            )
+
+            step = "health_information"
+            received = self._health_information(
+                timings, patient, consent_id, date_range
+            )
+        except Exception as e:
+            logger.warning("Cycle failed at %s: %s", step, e)
+            return timings, step, received
+
+        return timings, None, received
+
+    def _health_information(self, timings, patient, consent_id, date_range) -> int:
+        """
+        Requests health information as an HIU and times it until the plugin
+        has pushed the data and notified the consent manager of the transfer.
+        """
+        transaction_id = self.uuid()
+        request_id = self.uuid()
+        key_material = KeyMaterial.generate()
+
+        pushed = self.simulator.expect("/data-push", transaction_id)
+        try:
+            seconds, notified = self._step(
+                "/api/v3/hip/health-information/request",
+                "/data-flow/v3/health-information/notify",
+                transaction_id,
+                {
+                    "transactionId": transaction_id,
+                    "hiRequest": {
+                        "consent": {"id": consent_id},
+                        "dateRange": date_range,
+                        "dataPushUrl": f"{self.simulator.url}/data-push",
+                        "keyMaterial": {
+                            "cryptoAlg": "ECDH",
+                            "curve": "Curve25519",
+                            "dhPublicKey": {
+                                "expiry": timestamp(timedelta(days=1)),
+                                "parameters": "Curve25519/32byte random key",
+                                "keyValue": key_material.x509_public_key,
+                            },
+                            "nonce": key_material.nonce,
+                        },
+                    },
+                },
+                {"X-HIP-ID": patient.hf_id, "REQUEST-ID": request_id},
+            )
+
+            session_status = (
+                notified.get("notification", {})
+                .get("statusNotification", {})
+                .get("sessionStatus")
+            )
+            if session_status != "TRANSFERRED":
+                raise CycleError(f"Transfer {session_status}")
+
+            data = pushed.result(timeout=self.timeout)
+        finally:
+            self.simulator.forget("/data-push", transaction_id)
+
+        timings["health_information"] = seconds
+
+        received = 0
+        for entry in data.get("entries", []):
+            content = entry.get("content", "")
+            if self.verify_data:
+                cipher = Cipher(
+                    external_public_key=data["keyMaterial"]["dhPublicKey"]["keyValue"],
+                    external_nonce=data["keyMaterial"]["nonce"],
+                    internal_private_key=key_material.private_key,
+                    internal_public_key=key_material.public_key,
+                    internal_nonce=key_material.nonce,
+                )
+                content = cipher.decrypt(content)
+
+            received += len(content)
+
+        return received
@@ -0,0 +1,593 @@
+import json
+import logging
+import random
+import threading
+import time
+from base64 import b64encode, urlsafe_b64encode
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+import jwt
+import requests
+from Crypto.PublicKey import RSA
+
+logger = logging.getLogger(__name__)
+
+
+def uuid() -> str:
+    return str(uuid4())
+
+
+def timestamp(delta: timedelta = timedelta()) -> str:
+    return (datetime.now(tz=UTC) + delta).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _b64url_int(value: int) -> str:
+    raw = value.to_bytes((value.bit_length() + 7) // 8, byteorder="big")
+    return urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+@dataclass
+class SimulatorConfig:
+    # base url of the plugin's callback routes, eg. http://localhost:9000/api/abdm
+    callback_url: str
+    cm_id: str = "sbx"
+    # seconds added to every response, plus a uniform random jitter
+    latency: float = 0
+    jitter: float = 0
+    # fraction of calls answered with error_status instead
+    error_rate: float = 0
+    error_status: int = 500
+    # seconds before a callback the gateway owes (eg. on-init) is sent
+    callback_delay: float = 0
+    # whether consent requests are granted right after on-init
+    auto_grant: bool = True
+
+
+class GatewaySimulator:
+    """
+    Local stand-in for the ABDM gateway, consent manager, ABHA and facility
+    APIs. Answers the calls made by GatewayService, HealthIdService and
+    FacilityService, sends the callbacks the gateway owes for them, and signs
+    callbacks with its own key served at /gateway/v3/certs so that
+    ABDMAuthentication accepts them.
+
+    Every call received is matched by its transactionId and response
+    requestId against the futures returned by expect(), which is how the
+    load driver times the plugin's side of each flow.
+    """
+
+    def __init__(self, config: SimulatorConfig):
+        self.config = config
+        self.key = RSA.generate(2048)
+        self.key_id = uuid()
+        self.server = None
+
+        self._executor = ThreadPoolExecutor(max_workers=32)
+        self._lock = threading.Lock()
+        self._expected = {}
+        self._consent_requests = {}
+        self._token = None
+
+        self.routes = {
+            ("GET", "/gateway/v3/certs"): self.certs,
+            ("POST", "/gateway/v3/sessions"): self.sessions,
+            ("POST", "/v3/token/generate-token"): self.generate_token,
+            ("POST", "/hip/v3/link/carecontext"): self.link_care_context,
+            ("POST", "/consent/v3/request/init"): self.consent_request_init,
+            ("POST", "/consent/v3/request/status"): self.consent_request_status,
+            ("POST", "/consent/v3/fetch"): self.consent_fetch,
+            (
+                "POST",
+                "/data-flow/v3/health-information/request",
+            ): self.health_information_request,
+            ("POST", "/identity/authentication"): self.identity_authentication,
+            ("POST", "/bridges/MutipleHRPAddUpdateServices"): self.facility_update,
+            ("GET", "/v3/profile/public/certificate"): self.public_certificate,
+            **{
+                ("POST", path): self.abha_otp
+                for path in (
+                    "/v3/enrollment/request/otp",
+                    "/v3/profile/login/request/otp",
+                    "/v3/phr/web/login/abha/request/otp",
+                )
+            },
+            ("POST", "/v3/enrollment/enrol/byAadhaar"): self.abha_enrol,
+            ("POST", "/v3/enrollment/auth/byAbdm"): self.abha_verify,
+            ("GET", "/v3/enrollment/enrol/suggestion"): self.abha_suggestion,
+            ("POST", "/v3/enrollment/enrol/abha-address"): self.abha_address,
+            ("POST", "/v3/profile/login/verify"): self.abha_verify,
+            ("POST", "/v3/phr/web/login/abha/verify"): self.abha_verify,
+            ("POST", "/v3/phr/web/login/abha/search"): self.abha_search,
+            ("POST", "/v3/profile/login/verify/user"): self.abha_user_token,
+            ("GET", "/v3/profile/account"): self.abha_profile,
+            ("GET", "/v3/profile/account/abha-card"): self.abha_card,
+        }
+
+    # server
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8090):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+            def do_GET(self):
+                simulator._handle(self)
+
+            def do_POST(self):
+                simulator._handle(self)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        return self.server
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def shutdown(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        path = urlsplit(handler.path).path
+
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            payload = {}
+
+        delay = self.config.latency + random.uniform(0, self.config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        route = self.routes.get((handler.command, path))
+        if (
+            route != self.certs
+            and self.config.error_rate
+            and random.random() < self.config.error_rate
+        ):
+            status, headers, content = self._error()
+        elif route:
+            status, headers, content = route(payload, handler.headers)
+        else:
+            # acknowledgements (on-discover, on-notify, ...) and data pushes
+            status, headers, content = 202, {}, b""
+
+        if status < 400:
+            self._resolve(path, payload)
+
+        if not isinstance(content, bytes):
+            content = json.dumps(content).encode()
+            headers.setdefault("Content-Type", "application/json")
+
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
+
+    def _error(self):
+        headers = {}
+        if self.config.error_status == 429:
+            headers["Retry-After"] = "1"
+
+        return (
+            self.config.error_status,
+            headers,
+            {"error": {"code": "ABDM-9999", "message": "Simulated error"}},
+        )
+
+    # matching calls from the plugin
+
+    @staticmethod
+    def _ids(payload: dict) -> set:
+        if not isinstance(payload, dict):
+            return set()
+
+        ids = {
+            payload.get("transactionId"),
+            (payload.get("response") or {}).get("requestId"),
+            (payload.get("notification") or {}).get("transactionId"),
+            (payload.get("hiRequest") or {}).get("transactionId"),
+        }
+        ids.discard(None)
+        return {str(id) for id in ids}
+
+    def expect(self, path: str, id: str) -> Future:
+        """
+        Returns a future resolved with the payload of the next call to path
+        carrying id as its transactionId or response requestId.
+        """
+        future = Future()
+        with self._lock:
+            self._expected[(path, id)] = future
+
+        return future
+
+    def forget(self, path: str, id: str):
+        with self._lock:
+            self._expected.pop((path, id), None)
+
+    def _resolve(self, path: str, payload: dict):
+        with self._lock:
+            futures = [
+                self._expected.pop((path, id), None) for id in self._ids(payload)
+            ]
+
+        for future in futures:
+            if future and not future.done():
+                future.set_result(payload)
+
+    # callbacks to the plugin
+
+    def token(self) -> str:
+        now = int(time.time())
+        if not self._token or self._token[1] < now + 60:
+            expires_at = now + 3600
+            self._token = (
+                jwt.encode(
+                    {
+                        "sub": "abdm-simulator",
+                        "aud": "account",
+                        "iat": now,
+                        "exp": expires_at,
+                    },
+                    self.key.export_key("PEM"),
+                    algorithm="RS256",
+                    headers={"kid": self.key_id},
+                ),
+                expires_at,
+            )
+
+        return self._token[0]
+
+    def callback(self, path: str, payload: dict, headers: dict | None = None):
+        """
+        Sends a callback to the plugin as the gateway would and returns the
+        response.
+        """
+        return requests.post(
+            self.config.callback_url + path,
+            data=json.dumps(payload),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.token()}",
+                "REQUEST-ID": uuid(),
+                "TIMESTAMP": timestamp(),
+                "X-CM-ID": self.config.cm_id,
+                **(headers or {}),
+            },
+            timeout=60,
+        )
+
+    def _later(self, path: str, payload: dict, headers: dict | None = None):
+        def send():
+            if self.config.callback_delay:
+                time.sleep(self.config.callback_delay)
+
+            try:
+                response = self.callback(path, payload, headers)
+                if response.status_code >= 400:
+                    logger.warning(
+                        "Callback %s answered %s: %s",
+                        path,
+                        response.status_code,
+                        response.text[:200],
+                    )
+            except requests.RequestException as e:
+                logger.warning("Callback %s failed: %s", path, e)
+
+        self._executor.submit(send)
+
+    # gateway
+
+    def certs(self, payload, headers):
+        public_key = self.key.publickey()
+        return (
+            200,
+            {},
+            {
+                "keys": [
+                    {
+                        "kty": "RSA",
+                        "alg": "RS256",
+                        "use": "sig",
+                        "kid": self.key_id,
+                        "n": _b64url_int(public_key.n),
+                        "e": _b64url_int(public_key.e),
+                    }
+                ]
+            },
+        )
+
+    def sessions(self, payload, headers):
+        return (
+            200,
+            {},
+            {
+                "accessToken": self.token(),
+                "expiresIn": 1200,
+                "refreshExpiresIn": 1800,
+                "refreshToken": uuid(),
+                "tokenType": "bearer",
+            },
+        )
+
+    def generate_token(self, payload, headers):
+        self._later(
+            "/api/v3/hip/token/on-generate-token",
+            {
+                "abhaAddress": payload.get("abhaAddress"),
+                "linkToken": uuid(),
+                "response": {"requestId": headers.get("REQUEST-ID")},
+            },
+        )
+        return 202, {}, b""
+
+    def link_care_context(self, payload, headers):
+        self._later(
+            "/api/v3/link/on_carecontext",
+            {
+                "abhaAddress": payload.get("abhaAddress"),
+                "status": "Successfully Linked care context",
+                "response": {"requestId": headers.get("REQUEST-ID")},
+            },
+        )
+        return 202, {}, b""
+
+    def consent_request_init(self, payload, headers):
+        consent = payload.get("consent", {})
+        consent_request_id = uuid()
+        artefact_ids = [uuid()]
+        with self._lock:
+            self._consent_requests[consent_request_id] = {
+                "consent": consent,
+                "artefact_ids": artefact_ids,
+                "status": "GRANTED" if self.config.auto_grant else "REQUESTED",
+            }
+            for artefact_id in artefact_ids:
+                self._consent_requests[artefact_id] = self._consent_requests[
+                    consent_request_id
+                ]
+
+        self._later(
+            "/api/v3/hiu/consent/request/on-init",
+            {
+                "consentRequest": {"id": consent_request_id},
+                "response": {"requestId": headers.get("REQUEST-ID")},
+            },
+        )
+
+        if self.config.auto_grant:
+            self._later(
+                "/api/v3/hiu/consent/request/notify",
+                {
+                    "notification": {
+                        "consentRequestId": consent_request_id,
+                        "status": "GRANTED",
+                        "consentArtefacts": [{"id": id} for id in artefact_ids],
+                    }
+                },
+            )
+
+        return 202, {}, b""
+
+    def consent_request_status(self, payload, headers):
+        consent_request_id = payload.get("consentRequestId")
+        consent_request = self._consent_requests.get(consent_request_id)
+        if not consent_request:
+            return 404, {}, {"error": {"code": "ABDM-1009", "message": "Not found"}}
+
+        self._later(
+            "/api/v3/hiu/consent/request/on-status",
+            {
+                "consentRequest": {
+                    "id": consent_request_id,
+                    "status": consent_request["status"],
+                    "consentArtefacts": [
+                        {"id": id} for id in consent_request["artefact_ids"]
+                    ],
+                },
+                "response": {"requestId": headers.get("REQUEST-ID")},
+            },
+        )
+        return 202, {}, b""
+
+    def consent_fetch(self, payload, headers):
+        artefact_id = payload.get("consentId")
+        consent_request = self._consent_requests.get(artefact_id)
+        if not consent_request:
+            return 404, {}, {"error": {"code": "ABDM-1009", "message": "Not found"}}
+
+        consent = consent_request["consent"]
+        permission = consent.get("permission", {})
+        self._later(
+            "/api/v3/hiu/consent/on-fetch",
+            {
+                "consent": {
+                    "status": consent_request["status"],
+                    "consentDetail": {
+                        "schemaVersion": "v3",
+                        "consentId": artefact_id,
+                        "createdAt": timestamp(),
+                        "patient": consent.get("patient"),
+                        "careContexts": [],
+                        "purpose": consent.get("purpose"),
+                        "hip": {"id": "simulated-hip"},
+                        "hiu": consent.get("hiu"),
+                        "requester": consent.get("requester"),
+                        "consentManager": {"id": self.config.cm_id},
+                        "hiTypes": consent.get("hiTypes"),
+                        "permission": {
+                            "accessMode": permission.get("accessMode"),
+                            "dateRange": permission.get("dateRange"),
+                            "dataEraseAt": permission.get("dataEraseAt"),
+                            "frequency": permission.get("frequency"),
+                        },
+                    },
+                    "signature": b64encode(uuid().encode()).decode(),
+                },
+                "response": {"requestId": headers.get("REQUEST-ID")},
+            },
+        )
+        return 202, {}, b""
+
+    def health_information_request(self, payload, headers):
+        self._later(
+            "/api/v3/hiu/health-information/on-request",
+            {
+                "hiRequest": {
+                    "transactionId": uuid(),
+                    "sessionStatus": "REQUESTED",
+                },
+                "response": {"requestId": headers.get("REQUEST-ID")},
+            },
+        )
+        return 202, {}, b""
+
+    def identity_authentication(self, payload, headers):
+        return 200, {}, {"authenticated": True, "transactionId": uuid()}
+
+    def facility_update(self, payload, headers):
+        return 200, {}, [{"facilityId": payload.get("facilityId"), "status": "OK"}]
+
+    # abha, with a synthetic profile
+
+    def public_certificate(self, payload, headers):
+        return (
+            200,
+            {},
+            {
+                "publicKey": b64encode(self.key.publickey().export_key("DER")).decode(),
+                "encryptionAlgorithm": "RSA/ECB/OAEPWithSHA-1AndMGF1Padding",
+            },
+        )
+
+    @staticmethod
+    def _profile() -> dict:
+        number = f"{random.randrange(10**13, 10**14):014d}"
+        return {
+            "ABHANumber": f"{number[:2]}-{number[2:6]}-{number[6:10]}-{number[10:]}",
+            "preferredAbhaAddress": f"simulated.{number[-6:]}@sbx",
+            "name": "Simulated Patient",
+            "firstName": "Simulated",
+            "middleName": "",
+            "lastName": "Patient",
+            "gender": "M",
+            "yearOfBirth": "1990",
+            "monthOfBirth": "01",
+            "dayOfBirth": "01",
+            "address": "Simulated address",
+            "districtName": "Ernakulam",
+            "stateName": "Kerala",
+            "pincode": "682001",
+            "mobile": "9999999999",
+            "email": None,
+            "profilePhoto": None,
+        }
+
+    def abha_otp(self, payload, headers):
+        return 200, {}, {"txnId": uuid(), "message": "OTP sent (simulated)"}
+
+    def abha_enrol(self, payload, headers):
+        tokens = {
+            "token": self.token(),
+            "expiresIn": 1800,
+            "refreshToken": uuid(),
+            "refreshExpiresIn": 1296000,
+        }
+        return (
+            200,
+            {},
+            {
+                "message": "Account created successfully",
+                "txnId": uuid(),
+                "tokens": tokens,
+                "jwtResponse": tokens,
+                "ABHAProfile": self._profile(),
+                "isNew": True,
+                "new": True,
+            },
+        )
+
+    def abha_verify(self, payload, headers):
+        profile = self._profile()
+        return (
+            200,
+            {},
+            {
+                "txnId": uuid(),
+                "authResult": "success",
+                "message": "OTP verified successfully",
+                "token": self.token(),
+                "refreshToken": uuid(),
+                "accounts": [profile],
+                "users": [
+                    {
+                        "abhaAddress": profile["preferredAbhaAddress"],
+                        "fullName": profile["name"],
+                        "abhaNumber": profile["ABHANumber"],
+                    }
+                ],
+            },
+        )
+
+    def abha_suggestion(self, payload, headers):
+        return (
+            200,
+            {},
+            {
+                "txnId": uuid(),
+                "abhaAddressList": [f"simulated.{i}" for i in range(3)],
+            },
+        )
+
+    def abha_address(self, payload, headers):
+        profile = self._profile()
+        return (
+            200,
+            {},
+            {
+                "txnId": uuid(),
+                "healthIdNumber": profile["ABHANumber"],
+                "preferredAbhaAddress": profile["preferredAbhaAddress"],
+            },
+        )
+
+    def abha_search(self, payload, headers):
+        profile = self._profile()
+        return (
+            200,
+            {},
+            {
+                "txnId": uuid(),
+                "healthIdNumber": profile["ABHANumber"],
+                "abhaAddress": profile["preferredAbhaAddress"],
+                "authMethods": ["MOBILE_OTP", "AADHAAR_OTP"],
+            },
+        )
+
+    def abha_user_token(self, payload, headers):
+        return 200, {}, {"token": self.token(), "refreshToken": uuid()}
+
+    def abha_profile(self, payload, headers):
+        return 200, {}, self._profile()
+
+    def abha_card(self, payload, headers):
+        return 202, {"Content-Type": "image/png"}, b"\x89PNG\r\n\x1a\n"
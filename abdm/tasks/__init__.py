@@ -3,7 +3,16 @@ import random
 from celery import current_app
 from celery.schedules import crontab
 
+from abdm.tasks.consent_fetch import fetch_consent_artefact  # noqa F401
+from abdm.tasks.reconcile_consent_requests import reconcile_consent_requests
+from abdm.tasks.refill_key_material_pool import refill_key_material_pool
 from abdm.tasks.retry_failed_care_contexts import retry_failed_care_contexts
+from abdm.tasks.sweep_expired_consent_artefacts import (
+    sweep_expired_consent_artefacts,
+)
+from abdm.tasks.update_hf_id_in_transactions import (  # noqa F401
+    update_hf_id_in_transactions,
+)
 
 
 @current_app.on_after_finalize.connect
@@ -13,3 +22,23 @@ def setup_periodic_tasks(sender, **kwargs):
         retry_failed_care_contexts.s(),
         name="retry_failed_care_contexts",
     )
+    sender.add_periodic_task(
+        crontab(minute="*/5"),
+        retry_failed_care_contexts.s(stale_only=True),
+        name="retry_stale_care_context_links",
+    )
+    sender.add_periodic_task(
+        crontab(minute="*"),
+        refill_key_material_pool.s(),
+        name="refill_key_material_pool",
+    )
+    sender.add_periodic_task(
+        crontab(minute="*/15"),
+        reconcile_consent_requests.s(),
+        name="reconcile_consent_requests",
+    )
+    sender.add_periodic_task(
+        crontab(minute="7"),
+        sweep_expired_consent_artefacts.s(),
+        name="sweep_expired_consent_artefacts",
+    )
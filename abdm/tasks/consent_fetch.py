@@ -0,0 +1,30 @@
+import logging
+
+from celery import shared_task
+
+from abdm.models.consent import ConsentArtefact
+from abdm.service.helper import ABDMAPIException
+from abdm.service.v3.gateway import GatewayService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def fetch_consent_artefact(self, artefact_id: str):
+    artefact = (
+        ConsentArtefact.objects.filter(external_id=artefact_id)
+        .select_related("patient_abha")
+        .first()
+    )
+
+    if not artefact:
+        logger.warning("Consent Artefact: %s not found in the database", artefact_id)
+        return
+
+    try:
+        GatewayService.consent__fetch({"artefact": artefact})
+    except ABDMAPIException as e:
+        logger.warning(
+            "Error while fetching consent artefact %s: %s", artefact_id, str(e)
+        )
+        raise self.retry(exc=e)
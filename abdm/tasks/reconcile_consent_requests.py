@@ -0,0 +1,93 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from celery import shared_task
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from abdm.models.base import Status
+from abdm.models.consent import ConsentRequest
+from abdm.service.v3.gateway import GatewayService
+from abdm.settings import plugin_settings as settings
+
+logger = logging.getLogger(__name__)
+
+
+CONSENT_RECONCILIATION_METRICS_CACHE_KEY = "abdm_consent_reconciliation_metrics"
+
+
+def request_consent_status(consent: ConsentRequest) -> bool:
+    try:
+        GatewayService.consent__request__status({"consent": consent})
+        return True
+    except Exception as e:
+        logger.warning(
+            "Error while requesting status of consent request %s: %s",
+            consent.external_id,
+            str(e),
+        )
+        return False
+    finally:
+        # worker threads open their own connections while resolving the hf_id
+        connection.close()
+
+
+@shared_task
+def reconcile_consent_requests():
+    """
+    Asks the consent manager for the status of consent requests that have been
+    REQUESTED for a while without a callback. The statuses are applied by the
+    hiu/consent/request/on-status callback.
+    """
+    started_at = time.monotonic()
+    now = timezone.now()
+    stale_before = now - timezone.timedelta(
+        seconds=settings.ABDM_CONSENT_RECONCILIATION_STALE_AFTER
+    )
+    metrics = {"selected": 0, "requested": 0, "failed": 0, "expired": 0}
+
+    # past their expiry there is nothing left to reconcile
+    metrics["expired"] = ConsentRequest.objects.filter(
+        status=Status.REQUESTED, expiry__lt=now
+    ).update(status=Status.EXPIRED, modified_date=now)
+
+    last_id = 0
+    with ThreadPoolExecutor(
+        max_workers=settings.ABDM_CONSENT_RECONCILIATION_CONCURRENCY
+    ) as executor:
+        while True:
+            batch = list(
+                ConsentRequest.objects.filter(
+                    status=Status.REQUESTED,
+                    modified_date__lt=stale_before,
+                    consent_id__isnull=False,
+                    id__gt=last_id,
+                )
+                .select_related("patient_abha")
+                .order_by("id")[: settings.ABDM_CONSENT_RECONCILIATION_BATCH_SIZE]
+            )
+
+            if not batch:
+                break
+
+            last_id = batch[-1].id
+            results = list(executor.map(request_consent_status, batch))
+
+            # push the polled requests out of the stale window until the next run
+            ConsentRequest.objects.filter(
+                id__in=[consent.id for consent in batch]
+            ).update(modified_date=timezone.now())
+
+            metrics["selected"] += len(batch)
+            metrics["requested"] += results.count(True)
+            metrics["failed"] += results.count(False)
+
+    metrics["duration"] = round(time.monotonic() - started_at, 3)
+    metrics["finished_at"] = timezone.now().isoformat()
+
+    cache.set(CONSENT_RECONCILIATION_METRICS_CACHE_KEY, metrics, timeout=None)
+    logger.info("Reconciled consent requests: %s", metrics)
+
+    return metrics
@@ -0,0 +1,22 @@
+import logging
+
+from celery import shared_task
+
+from abdm.models.key_material import KeyMaterialPool
+from abdm.settings import plugin_settings as settings
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refill_key_material_pool():
+    if (
+        KeyMaterialPool.objects.count()
+        >= settings.ABDM_KEY_MATERIAL_POOL_LOW_WATER_MARK
+    ):
+        return 0
+
+    added = KeyMaterialPool.refill(settings.ABDM_KEY_MATERIAL_POOL_SIZE)
+    logger.info("Added %s key materials to the pool", added)
+
+    return added
@@ -1,23 +1,34 @@
 import logging
+from datetime import timedelta
 
 from celery import shared_task
 from django.db.models import Count, F, Q
+from django.utils import timezone
 
-from abdm.models.abha_number import AbhaNumber
 from abdm.models.transaction import Transaction, TransactionStatus, TransactionType
+from abdm.service import abha_resolver
 from abdm.service.helper import care_context_dict_from_reference_id
-from abdm.service.v3.gateway import GatewayService
+from abdm.service.link_token import LINK_TOKEN_REQUEST_TIMEOUT
+from abdm.service.v3.gateway import GatewayService, batch_link_transactions
 
 logger = logging.getLogger(__name__)
 
 
-CARE_CONTEXT_BATCH_SIZE = 50
-
-
 @shared_task
-def retry_failed_care_contexts():
+def retry_failed_care_contexts(stale_only: bool = False):
+    """
+    Retries failed care context links, and the ones still INITIATED after a
+    link token request for them would have been given up on (eg. when its
+    callback was lost). Links queued behind a token request still in flight
+    are left alone. With stale_only, failed links are not retried.
+    """
+    stale = Q(
+        status=TransactionStatus.INITIATED,
+        modified_date__lt=timezone.now()
+        - timedelta(seconds=LINK_TOKEN_REQUEST_TIMEOUT),
+    )
     filtered_transactions = Transaction.objects.filter(
-        status__in=[TransactionStatus.INITIATED, TransactionStatus.FAILED],
+        stale if stale_only else stale | Q(status=TransactionStatus.FAILED),
         type=TransactionType.LINK_CARE_CONTEXT,
     )
 
@@ -28,9 +39,7 @@ def retry_failed_care_contexts():
 
     for transaction_query in grouped_transactions:
         abha_id = transaction_query["abha_number"]
-        abha_number = AbhaNumber.objects.filter(
-            Q(abha_number=abha_id) | Q(health_id=abha_id) | Q(external_id=abha_id)
-        ).first()
+        abha_number = abha_resolver.resolve_abha_number(abha_id)
         if not abha_number:
             continue
 
@@ -43,40 +52,42 @@ def retry_failed_care_contexts():
             meta_data__abha_number=transaction_query["abha_number"],
         )
 
-        care_contexts = []
-        for transaction in patients_transactions:
-            if transaction.meta_data.get("type") != "hip_initiated_linking":
-                continue
+        transactions = [
+            transaction
+            for transaction in patients_transactions.order_by("created_date")
+            if transaction.meta_data.get("type") == "hip_initiated_linking"
+        ]
+        if not transactions:
+            continue
 
+        care_contexts = {}
+        for transaction in transactions:
             for care_context_reference in transaction.meta_data.get("care_contexts"):
                 care_context = care_context_dict_from_reference_id(
                     care_context_reference
                 )
 
                 if care_context:
-                    care_contexts.append(care_context)
-
-            transaction.status = TransactionStatus.CANCELLED
-            transaction.save()
-
-        if len(care_contexts) == 0:
-            continue
+                    care_contexts[care_context_reference] = care_context
 
-        for i in range(0, len(care_contexts), CARE_CONTEXT_BATCH_SIZE):
-            batch = care_contexts[i : i + CARE_CONTEXT_BATCH_SIZE]
+        user = transactions[0].created_by
+        for reference_id, batch in batch_link_transactions(
+            transactions, list(care_contexts.values()), user
+        ):
             try:
                 GatewayService.link__carecontext(
                     {
+                        "reference_id": reference_id,
                         "patient": patient,
                         "care_contexts": batch,
-                        "user": transaction.created_by,
-                        "hf_id": transaction.meta_data.get("hf_id"),
+                        "user": user,
+                        "hf_id": transaction_query["hf_id"],
                     }
                 )
             except Exception as e:
                 logger.exception(
                     "Error while retrying care context linking for transaction %s with error %s",
-                    transaction.id,
+                    reference_id,
                     str(e),
                 )
                 continue
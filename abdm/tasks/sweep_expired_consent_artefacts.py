@@ -0,0 +1,122 @@
+import logging
+
+import boto3
+from celery import shared_task
+from django.db import transaction
+from django.utils import timezone
+
+from abdm.models.base import Status
+from abdm.models.consent import ConsentArtefact
+from abdm.models.health_information import HealthInformationPage
+from abdm.settings import plugin_settings as settings
+from care.facility.models.file_upload import FileUpload
+from care.utils.csp.config import BucketType, get_client_config
+
+logger = logging.getLogger(__name__)
+
+
+EXPIRABLE_STATUSES = [Status.REQUESTED.value, Status.GRANTED.value]
+
+# maximum number of keys accepted by a single DeleteObjects call
+S3_DELETE_BATCH_SIZE = 1000
+
+
+def object_key(file: FileUpload) -> str:
+    # the key FileUpload.put_object stores the object under
+    return f"{FileUpload.FileType(file.file_type).name}/{file.internal_name}"
+
+
+def delete_health_information_objects() -> tuple[int, list[str]]:
+    """
+    Deletes the stored objects of the health information pages of expired
+    artefacts that are not erased yet, and marks their pages erased. Returns
+    the number of objects deleted and the keys that failed, whose pages are
+    retried on the next sweep.
+    """
+    config, bucket_name = get_client_config(BucketType.PATIENT)
+    s3 = boto3.client("s3", **config)
+
+    deleted = 0
+    failed_keys = []
+    last_id = 0
+
+    while True:
+        pages = list(
+            HealthInformationPage.objects.filter(
+                consent_artefact__status=Status.EXPIRED.value,
+                is_erased=False,
+                id__gt=last_id,
+            )
+            .select_related("file")
+            .only("id", "file__file_type", "file__internal_name")
+            .order_by("id")[:S3_DELETE_BATCH_SIZE]
+        )
+
+        if not pages:
+            break
+
+        last_id = pages[-1].id
+        keys = {object_key(page.file): page.id for page in pages}
+
+        try:
+            response = s3.delete_objects(
+                Bucket=bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+            )
+        except Exception:
+            logger.exception("Error while deleting health information objects")
+            failed_keys.extend(keys)
+            continue
+
+        for error in response.get("Errors", []):
+            logger.warning(
+                "Error while deleting health information %s: %s",
+                error.get("Key"),
+                error.get("Message"),
+            )
+            if keys.pop(error.get("Key"), None):
+                failed_keys.append(error.get("Key"))
+
+        HealthInformationPage.objects.filter(id__in=keys.values()).update(
+            is_erased=True
+        )
+        deleted += len(keys)
+
+    return deleted, failed_keys
+
+
+@shared_task
+def sweep_expired_consent_artefacts():
+    now = timezone.now()
+    metrics = {"expired": 0, "deleted_objects": 0, "failed_objects": []}
+
+    while True:
+        artefacts = list(
+            ConsentArtefact.objects.filter(
+                status__in=EXPIRABLE_STATUSES, expiry__lt=now
+            )
+            .select_related("consent_request")
+            .order_by("expiry")[: settings.ABDM_CONSENT_EXPIRY_SWEEP_BATCH_SIZE]
+        )
+
+        if not artefacts:
+            break
+
+        # archived together, so a failure leaves the artefacts to the next sweep
+        with transaction.atomic():
+            ConsentArtefact.objects.filter(
+                id__in=[artefact.id for artefact in artefacts]
+            ).update(status=Status.EXPIRED.value, modified_date=now)
+            ConsentArtefact.archive_health_information(artefacts, Status.EXPIRED.value)
+
+        metrics["expired"] += len(artefacts)
+
+    # erased separately, so pages that failed before are retried too
+    if settings.ABDM_DELETE_EXPIRED_HEALTH_INFORMATION:
+        metrics["deleted_objects"], metrics["failed_objects"] = (
+            delete_health_information_objects()
+        )
+
+    logger.info("Swept expired consent artefacts: %s", metrics)
+
+    return metrics
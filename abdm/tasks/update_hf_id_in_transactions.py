@@ -0,0 +1,41 @@
+import logging
+
+from celery import shared_task
+
+from abdm.models.health_facility import HealthFacility
+
+logger = logging.getLogger(__name__)
+
+
+HF_ID_UPDATE_BATCH_SIZE = 1000
+
+
+@shared_task(bind=True)
+def update_hf_id_in_transactions(self, old_hf_id: str, new_hf_id: str):
+    def report_progress(updated):
+        self.update_state(
+            state="PROGRESS",
+            meta={"old_hf_id": old_hf_id, "new_hf_id": new_hf_id, "updated": updated},
+        )
+        logger.info(
+            "Updated hf_id from %s to %s in %s transactions so far",
+            old_hf_id,
+            new_hf_id,
+            updated,
+        )
+
+    total_updated = HealthFacility._update_hf_id_in_transactions(
+        old_hf_id,
+        new_hf_id,
+        batch_size=HF_ID_UPDATE_BATCH_SIZE,
+        on_progress=report_progress,
+    )
+
+    logger.info(
+        "Finished updating hf_id from %s to %s in %s transactions",
+        old_hf_id,
+        new_hf_id,
+        total_updated,
+    )
+
+    return total_updated
@@ -36,6 +36,7 @@ from fhir.resources.R4B.reference import Reference
 from fhir.resources.R4B.resource import Resource
 
 from abdm.models import HealthFacility
+from abdm.service.data_flow_trace import traced
 from abdm.service.helper import uuid  # TODO: stop using random uuid
 from abdm.settings import plugin_settings as settings
 from care.facility.models import (
@@ -1265,6 +1266,7 @@ class Fhir:
     def _bundle_entry(self, resource: Resource):
         return BundleEntry(fullUrl=self._reference_url(resource), resource=resource)
 
+    @traced("fhir_build")
     def create_wellness_record(self, daily_round: DailyRound):
         id = uuid()
         now = datetime.now(UTC).isoformat()
@@ -1289,6 +1291,7 @@ class Fhir:
             ],
         )
 
+    @traced("fhir_build")
     def create_diagnostic_report_record(self, investigation: InvestigationSession):
         id = uuid()
         now = datetime.now(UTC).isoformat()
@@ -1311,6 +1314,7 @@ class Fhir:
             ],
         )
 
+    @traced("fhir_build")
     def create_prescription_record(self, prescriptions: list[Prescription]):
         id = uuid()
         now = datetime.now(UTC).isoformat()
@@ -1333,6 +1337,7 @@ class Fhir:
             ],
         )
 
+    @traced("fhir_build")
     def create_discharge_summary_record(self, consultation: PatientConsultation):
         id = uuid()
         now = datetime.now(UTC).isoformat()
@@ -1355,6 +1360,7 @@ class Fhir:
             ],
         )
 
+    @traced("fhir_build")
     def create_op_consultation_record(self, consultation: PatientConsultation):
         id = uuid()
         now = datetime.now(UTC).isoformat()
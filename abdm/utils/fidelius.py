@@ -29,6 +29,10 @@ BC25519 = curve.Curve(
     b"\x01\x03\x06\x01\x04\x01\x97U\x05\x01",
 )
 
+# Bouncy Castle encodes coordinates and shared secrets at the full field size,
+#   left padded with zeros, so about 1 in 128 keys has a shorter minimal form
+COORDINATE_SIZE = 32
+
 
 @dataclass(frozen=True)
 class KeyMaterial:
@@ -65,8 +69,8 @@ class KeyMaterial:
 
     @classmethod
     def encode_public_key_to_base64(cls, key: Point):
-        x_bytes = key.x.to_bytes((key.x.bit_length() + 7) // 8, byteorder="big")
-        y_bytes = key.y.to_bytes((key.y.bit_length() + 7) // 8, byteorder="big")
+        x_bytes = key.x.to_bytes(COORDINATE_SIZE, byteorder="big")
+        y_bytes = key.y.to_bytes(COORDINATE_SIZE, byteorder="big")
         return base64.b64encode(
             # 04 indicates uncompressed form
             b"\x04"
@@ -78,8 +82,8 @@ class KeyMaterial:
     def encode_x509_public_key_to_base64(cls, key: Point):
         # Adds Java Bouncy Castle X509 format prefix
         fixed_prefix_b64 = "MIIBMTCB6gYHKoZIzj0CATCB3gIBATArBgcqhkjOPQEBAiB/////////////////////////////////////////7TBEBCAqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqYSRShRAQge0Je0Je0Je0Je0Je0Je0Je0Je0Je0Je0JgtenHcQyGQEQQQqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqqq0kWiCuGaG4oIa04B7dLHdI0UySPU1+bXxhsinpxaJ+ztPZAiAQAAAAAAAAAAAAAAAAAAAAFN753qL3nNZYEmMaXPXT7QIBCANCAAQ="
-        x_bytes = key.x.to_bytes((key.x.bit_length() + 7) // 8, byteorder="big")
-        y_bytes = key.y.to_bytes((key.y.bit_length() + 7) // 8, byteorder="big")
+        x_bytes = key.x.to_bytes(COORDINATE_SIZE, byteorder="big")
+        y_bytes = key.y.to_bytes(COORDINATE_SIZE, byteorder="big")
         return base64.b64encode(
             base64.b64decode(fixed_prefix_b64) + x_bytes + y_bytes
         ).decode("utf-8")
@@ -187,9 +191,10 @@ class CryptoController:
     def compute_shared_secret(cls, sender_private_key, requester_public_key):
         private_key_int = cls.decode_base64_to_private_key(sender_private_key)
         public_key_point = cls.decode_base64_to_public_key(requester_public_key)
-        return KeyMaterial.encode_private_key_to_base64(
-            (private_key_int * public_key_point).x
-        )
+        shared_secret = (private_key_int * public_key_point).x
+        return base64.b64encode(
+            shared_secret.to_bytes(COORDINATE_SIZE, byteorder="big")
+        ).decode("utf-8")
 
     @classmethod
     def sha256_hkdf(cls, salt, shared_secret, key_length_in_bytes):
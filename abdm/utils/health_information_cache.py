@@ -0,0 +1,290 @@
+import hashlib
+import itertools
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from functools import cached_property
+
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+from django.core.cache import cache
+
+from abdm.settings import plugin_settings as settings
+from abdm.utils.secret import derive_key
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_LENGTH = 8
+NONCE_PREFIX_LENGTH = 7
+TAG_LENGTH = 16
+SEGMENT_SIZE = 64 * 1024
+TEMP_FILE_PREFIX = ".tmp-"
+
+INVALIDATED_CACHE_KEY_PREFIX = "abdm_health_information_cache_invalidated__"
+
+
+class HealthInformationCache:
+    """
+    Size-capped, least recently used disk cache of merged health information
+    documents, keyed by the artefact (or consent request) id they were read for.
+
+    Entries are encrypted with AES-GCM using a key derived from SECRET_KEY, in
+    segments of SEGMENT_SIZE bytes that each carry their own tag. The nonce of
+    a segment is a random prefix, its index and whether it is the last one, so
+    every segment is verified before it is served and a truncated or reordered
+    entry fails verification. Each entry is also keyed by a version of the
+    page files it was built from, so a change in the set of unarchived pages
+    never serves a stale document.
+
+    Every worker keeps its own entries. An entry is dropped once it is older
+    than ABDM_HEALTH_INFORMATION_CACHE_MAX_AGE or its artefact has expired,
+    whichever comes first, and invalidate() leaves a marker in the shared
+    cache for as long, so that other workers drop their copies when read.
+    """
+
+    @property
+    def max_size(self) -> int:
+        return settings.ABDM_HEALTH_INFORMATION_CACHE_SIZE
+
+    @property
+    def max_age(self) -> int:
+        return settings.ABDM_HEALTH_INFORMATION_CACHE_MAX_AGE
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    @cached_property
+    def directory(self) -> str:
+        directory = settings.ABDM_HEALTH_INFORMATION_CACHE_DIR or os.path.join(
+            tempfile.gettempdir(), "abdm_health_information"
+        )
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        return directory
+
+    @cached_property
+    def _key(self) -> bytes:
+        return derive_key("health-information-cache")
+
+    @staticmethod
+    def version(files) -> str:
+        return hashlib.sha256(
+            ",".join(str(file.id) for file in files).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def _prefix(self, reference_id: str) -> str:
+        return hashlib.sha256(str(reference_id).encode("utf-8")).hexdigest()
+
+    def _path(self, reference_id: str, version: str) -> str:
+        return os.path.join(self.directory, f"{self._prefix(reference_id)}.{version}")
+
+    def _invalidated_key(self, reference_id: str) -> str:
+        return f"{INVALIDATED_CACHE_KEY_PREFIX}{self._prefix(reference_id)}"
+
+    def _cipher(self, header: bytes, index: int, last: bool):
+        cipher = AES.new(
+            self._key,
+            AES.MODE_GCM,
+            nonce=header[DEADLINE_LENGTH:] + index.to_bytes(4, "big") + bytes([last]),
+        )
+        # the deadline is authenticated along with every segment
+        cipher.update(header[:DEADLINE_LENGTH])
+        return cipher
+
+    @staticmethod
+    def _deadline(file) -> int:
+        return int.from_bytes(file.read(DEADLINE_LENGTH), "big")
+
+    def read(self, reference_id: str, version: str):
+        """
+        Returns an iterator over the decrypted document, or None on a miss. An
+        entry past its deadline, or written before the reference was last
+        invalidated, is removed and a miss. A corrupted entry is removed and
+        also a miss if its first segment does not verify, later segments raise
+        when they are reached.
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(reference_id, version)
+        try:
+            file = open(path, "rb")  # noqa: SIM115
+            written_at = os.fstat(file.fileno()).st_mtime
+            # the access time orders entries for eviction, the modification
+            # time is kept as the time the entry was written
+            os.utime(path, (time.time(), written_at))
+        except FileNotFoundError:
+            return None
+
+        invalidated_at = cache.get(self._invalidated_key(reference_id))
+        if self._deadline(file) <= time.time() or (
+            invalidated_at is not None and written_at <= invalidated_at
+        ):
+            file.close()
+            self._remove(path)
+            return None
+
+        file.seek(0)
+        segments = self._decrypt(file, path)
+        try:
+            first = next(segments)
+        except StopIteration:
+            return iter(())
+        except ValueError:
+            return None
+
+        return itertools.chain((first,), segments)
+
+    def _decrypt(self, file, path: str):
+        with file:
+            size = os.fstat(file.fileno()).st_size
+            header = file.read(DEADLINE_LENGTH + NONCE_PREFIX_LENGTH)
+            remaining = size - len(header)
+            index = 0
+
+            while True:
+                segment = file.read(min(SEGMENT_SIZE + TAG_LENGTH, remaining))
+                remaining -= len(segment)
+
+                try:
+                    if (
+                        len(header) < DEADLINE_LENGTH + NONCE_PREFIX_LENGTH
+                        or len(segment) < TAG_LENGTH
+                    ):
+                        raise ValueError("Truncated segment")
+
+                    chunk = self._cipher(
+                        header, index, remaining == 0
+                    ).decrypt_and_verify(segment[:-TAG_LENGTH], segment[-TAG_LENGTH:])
+                except ValueError:
+                    logger.error(f"Corrupted health information cache entry: {path}")
+                    self._remove(path)
+                    raise
+
+                if chunk:
+                    yield chunk
+
+                if remaining == 0:
+                    return
+
+                index += 1
+
+    def write_through(
+        self,
+        reference_id: str,
+        version: str,
+        chunks,
+        expires_at: datetime | None = None,
+    ):
+        """
+        Yields the given chunks while writing them to the cache. The entry is
+        only committed once every chunk has been consumed, and is kept until
+        expires_at (the artefact's expiry) at the latest.
+        """
+        if not self.enabled:
+            yield from chunks
+            return
+
+        deadline = time.time() + self.max_age
+        if expires_at:
+            deadline = min(deadline, expires_at.timestamp())
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=TEMP_FILE_PREFIX)
+        committed = False
+        try:
+            header = int(deadline).to_bytes(DEADLINE_LENGTH, "big") + get_random_bytes(
+                NONCE_PREFIX_LENGTH
+            )
+            buffer = bytearray()
+            index = 0
+
+            with os.fdopen(fd, "wb") as file:
+                file.write(header)
+                for chunk in chunks:
+                    buffer += chunk
+                    # keep the last segment back, it is sealed as the last one
+                    while len(buffer) > SEGMENT_SIZE:
+                        file.write(
+                            b"".join(
+                                self._cipher(header, index, False).encrypt_and_digest(
+                                    bytes(buffer[:SEGMENT_SIZE])
+                                )
+                            )
+                        )
+                        del buffer[:SEGMENT_SIZE]
+                        index += 1
+
+                    yield chunk
+
+                file.write(
+                    b"".join(
+                        self._cipher(header, index, True).encrypt_and_digest(
+                            bytes(buffer)
+                        )
+                    )
+                )
+
+            os.replace(temp_path, self._path(reference_id, version))
+            committed = True
+        finally:
+            if not committed:
+                self._remove(temp_path)
+
+        self._evict()
+
+    def invalidate(self, reference_id: str):
+        """
+        Removes the local entries of the reference, and marks the ones other
+        workers hold as invalid for as long as they could be kept.
+        """
+        if not self.enabled:
+            return
+
+        cache.set(
+            self._invalidated_key(reference_id), time.time(), timeout=self.max_age
+        )
+
+        prefix = f"{self._prefix(reference_id)}."
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(prefix):
+                self._remove(entry.path)
+
+    def _evict(self):
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(TEMP_FILE_PREFIX):
+                continue
+
+            try:
+                stat = entry.stat()
+                with open(entry.path, "rb") as file:
+                    deadline = self._deadline(file)
+            except FileNotFoundError:
+                continue
+
+            if deadline <= now:
+                self._remove(entry.path)
+                continue
+
+            entries.append((stat.st_atime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            self._remove(path)
+            total_size -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+health_information_cache = HealthInformationCache()
@@ -0,0 +1,54 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+JSONDecodeError = json.JSONDecodeError
+
+
+def _default(obj):
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+
+    if isinstance(obj, UUID):
+        return str(obj)
+
+    if isinstance(obj, Decimal):
+        return str(obj)
+
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+def dumpb(data) -> bytes:
+    """
+    Serializes data to UTF-8 encoded JSON bytes.
+
+    datetime, date and time are written in ISO 8601, UUID and Decimal as strings
+    regardless of the backend in use.
+    """
+    if orjson:
+        return orjson.dumps(
+            data,
+            default=_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+
+    return json.dumps(
+        data, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def dumps(data) -> str:
+    return dumpb(data).decode("utf-8")
+
+
+def loads(data: str | bytes):
+    if orjson:
+        return orjson.loads(data)
+
+    return json.loads(data)
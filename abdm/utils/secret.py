@@ -0,0 +1,40 @@
+import base64
+
+from Crypto.Cipher import AES
+from Crypto.Hash import SHA256
+from Crypto.Protocol.KDF import HKDF
+from Crypto.Random import get_random_bytes
+from django.conf import settings
+
+NONCE_LENGTH = 12
+TAG_LENGTH = 16
+
+
+def derive_key(purpose: str) -> bytes:
+    """
+    Derives a 256 bit key for the given purpose from SECRET_KEY, so values
+    encrypted for one purpose cannot be decrypted for another.
+    """
+    return HKDF(
+        settings.SECRET_KEY.encode("utf-8"),
+        32,
+        f"abdm-{purpose}".encode("utf-8"),
+        SHA256,
+    )
+
+
+def encrypt(value: str, purpose: str) -> str:
+    nonce = get_random_bytes(NONCE_LENGTH)
+    cipher = AES.new(derive_key(purpose), AES.MODE_GCM, nonce=nonce)
+    ciphertext, tag = cipher.encrypt_and_digest(value.encode("utf-8"))
+
+    return base64.b64encode(nonce + ciphertext + tag).decode("utf-8")
+
+
+def decrypt(token: str, purpose: str) -> str:
+    data = base64.b64decode(token)
+    cipher = AES.new(derive_key(purpose), AES.MODE_GCM, nonce=data[:NONCE_LENGTH])
+
+    return cipher.decrypt_and_verify(
+        data[NONCE_LENGTH:-TAG_LENGTH], data[-TAG_LENGTH:]
+    ).decode("utf-8")
@@ -23,6 +23,11 @@ requirements = [
     "pycryptodome",
 ]
 
+extra_requirements = {
+    "orjson": ["orjson"],
+    "async": ["httpx"],
+}
+
 test_requirements = []
 
 setup(
@@ -41,6 +46,7 @@ setup(
     ],
     description="Nothing Much",
     install_requires=requirements,
+    extras_require=extra_requirements,
     license="MIT license",
     long_description=readme + "\n\n" + history,
     include_package_data=True,
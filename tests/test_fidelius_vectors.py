@@ -0,0 +1,34 @@
+"""Tests fidelius against its known answer vectors."""
+
+import unittest
+from base64 import b64decode
+from importlib.util import find_spec
+
+
+@unittest.skipUnless(
+    find_spec("fastecdsa") and find_spec("django"),
+    "fastecdsa and django are required",
+)
+class TestFideliusVectors(unittest.TestCase):
+    """Tests for `abdm.utils.fidelius`."""
+
+    def test_vectors(self):
+        from abdm.benchmarks import crypto
+
+        self.assertEqual(crypto.verify(), [])
+
+    def test_vectors_cover_leading_zero_bytes(self):
+        """Coordinates and shared secrets with a leading zero byte are padded."""
+        from abdm.benchmarks import crypto
+
+        vectors = crypto.load_vectors()
+        public_keys = [
+            b64decode(vector["publicKey"]) for vector in vectors["key_materials"]
+        ]
+        shared_secrets = [
+            b64decode(vector["sharedSecret"]) for vector in vectors["shared_secrets"]
+        ]
+
+        self.assertTrue(any(key[1] == 0 for key in public_keys))
+        self.assertTrue(any(key[33] == 0 for key in public_keys))
+        self.assertTrue(any(secret[0] == 0 for secret in shared_secrets))